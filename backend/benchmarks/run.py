@@ -0,0 +1,269 @@
+"""Offline latency and memory benchmark of the API endpoints.
+
+Serves synthetic sessions (see benchmarks/synthetic.py) in place of
+`fastf1.get_session` and the FastF1 car/position data loaders, so the real
+load path runs (load profiles, channel loading and upgrades, the Parquet
+store and the memory-mapped channel store, in a temporary directory), and
+requests every data endpoint in-process over a grid of driver counts x
+season counts. No network or FastF1 cache is needed.
+
+Run from the backend directory:
+
+    python -m benchmarks.run --drivers 1 3 5 10 --years 1 2 3 --output benchmarks/results/today.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+Per endpoint and grid cell it records:
+
+- cold_ms: first request with every backend cache empty (telemetry merge included)
+- warm_ms: median of --repeat requests with data caches warm but the response cache cleared
+- cached_ms: a request served from the response cache
+- peak_mb: peak Python heap allocation of a cold request (tracemalloc, this process only)
+
+With --compare, the run fails (exit code 1) when an endpoint's warm latency
+regressed by more than --threshold against the given results file.
+"""
+import argparse
+import atexit
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# The benchmark must not read or write the real store, circuit index or response cache
+_BENCH_DIR = tempfile.mkdtemp(prefix="bench-")
+atexit.register(lambda: shutil.rmtree(_BENCH_DIR, ignore_errors=True))
+os.environ["TELEMETRY_STORE_DIR"] = os.path.join(_BENCH_DIR, "Store")
+os.environ.setdefault("CIRCUIT_INDEX_PATH", os.path.join(_BENCH_DIR, "circuits.json"))
+os.environ.pop("RESPONSE_CACHE_DIR", None)
+os.environ.pop("CACHE_BACKEND", None)
+
+EVENT = "Bahrain Grand Prix"
+IDENTIFIER = "R"
+YEARS = [2023, 2022, 2021, 2020, 2019, 2018]
+
+
+def endpoint_params(drivers, years):
+    """Query parameters of every benchmarked endpoint for one selection."""
+    joined_years = ",".join(str(y) for y in years)
+    selection = {"session_name": EVENT, "identifier": IDENTIFIER, "drivers": drivers, "session_years": years}
+    return {
+        "/api/v1/telemetry": {"session_year": joined_years, "session_name": EVENT, "identifier": IDENTIFIER, "drivers": drivers},
+        "/api/v1/gear-data": {"session_year": years[0], "session_name": EVENT, "identifier": IDENTIFIER, "driver": drivers[0]},
+        "/api/v1/track-dominance": selection,
+        "/api/v1/braking-comparison": {"session_year": joined_years, "session_name": EVENT, "identifier": IDENTIFIER, "drivers": ",".join(drivers)},
+        "/api/v1/braking-distribution": {"session_year": joined_years, "session_name": EVENT, "identifier": IDENTIFIER, "drivers": drivers},
+        "/api/v1/AvgDiffs": selection,
+        "/api/v1/lap-gap-evolution": selection,
+        "/api/v1/dashboard": selection,
+    }
+
+
+class Bench:
+    def __init__(self, field_size, n_laps, verbose=False):
+        from fastapi.testclient import TestClient
+
+        import fastf1 as ff1
+
+        import main
+        from benchmarks.synthetic import make_session, raw_channels, without_channels
+        from utils import response_cache, sessions, store, telemetry
+
+        self._sessions = {}
+        self._raw = {}
+        self._make_session = make_session
+        self._raw_channels = raw_channels
+        self._without_channels = without_channels
+        self._store_dir = store.STORE_DIR
+        self.field_size = field_size
+        self.n_laps = n_laps
+        self.verbose = verbose
+        self._devnull = open(os.devnull, "w")
+
+        # Inject the synthetic sessions where FastF1 would fetch them; everything above runs as in production
+        ff1.get_session = lambda year, name, identifier: self._without_channels(self.session(int(year)))
+        sessions._CHANNEL_LOADERS = {
+            channel: (lambda api_path, channel=channel: self.raw(api_path)[channel]) for channel in ("car", "pos")
+        }
+        self._caches = [
+            sessions.session_cache, telemetry.laps_cache,
+            telemetry.telemetry_cache, response_cache.response_cache,
+        ]
+        self._response_cache = response_cache.response_cache
+        self.client = TestClient(main.app)
+
+    def session(self, year):
+        if year not in self._sessions:
+            self._sessions[year] = self._make_session(
+                year=year, event=EVENT, n_drivers=self.field_size, n_laps=self.n_laps,
+            )
+        return self._sessions[year]
+
+    def raw(self, api_path):
+        if api_path not in self._raw:
+            session = next(s for s in self._sessions.values() if s.api_path == api_path)
+            self._raw[api_path] = self._raw_channels(session)
+        # The loaders hand out fresh frames, as fetching does
+        return {
+            channel: {drv: frame.copy() for drv, frame in data.items()}
+            for channel, data in self._raw[api_path].items()
+        }
+
+    def clear_caches(self):
+        for cache in self._caches:
+            cache.clear()
+        # The store (laps, per-lap telemetry, mapped channels) is a cache too
+        shutil.rmtree(self._store_dir, ignore_errors=True)
+
+    def request(self, path, params):
+        quiet = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(self._devnull)
+        with quiet:
+            start = time.perf_counter()
+            response = self.client.get(path, params=params)
+            elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, response
+
+    def measure(self, path, params, repeat, memory):
+        self.clear_caches()
+        cold, response = self.request(path, params)
+
+        warm = []
+        for _ in range(repeat):
+            self._response_cache.clear()
+            warm.append(self.request(path, params)[0])
+        cached = self.request(path, params)[0]
+
+        peak_mb = None
+        if memory:
+            self.clear_caches()
+            tracemalloc.start()
+            self.request(path, params)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+
+        return {
+            "status": response.status_code,
+            "bytes": len(response.content),
+            "cold_ms": round(cold, 2),
+            "warm_ms": round(statistics.median(warm), 2) if warm else None,
+            "cached_ms": round(cached, 2),
+            "peak_mb": round(peak_mb, 2) if peak_mb is not None else None,
+        }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _metadata(args):
+    import fastf1
+    import numpy
+    import pandas
+
+    from utils.compute import COMPUTE_WORKERS
+
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": {"fastf1": fastf1.__version__, "pandas": pandas.__version__, "numpy": numpy.__version__},
+        "config": {
+            "field_size": args.field_size, "laps": args.laps, "repeat": args.repeat,
+            "compute_workers": COMPUTE_WORKERS,
+        },
+    }
+
+
+def compare(results, baseline, threshold, min_ms=5.0):
+    """Rows of `results` whose warm latency is more than `threshold` (fraction) and `min_ms` above `baseline`."""
+    previous = {(r["endpoint"], r["drivers"], r["years"]): r for r in baseline["results"]}
+    regressions = []
+    for row in results["results"]:
+        old = previous.get((row["endpoint"], row["drivers"], row["years"]))
+        if old is None or not old.get("warm_ms") or row.get("warm_ms") is None:
+            continue
+        if row["warm_ms"] > old["warm_ms"] * (1 + threshold) and row["warm_ms"] - old["warm_ms"] > min_ms:
+            regressions.append({**row, "baseline_warm_ms": old["warm_ms"]})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drivers", type=int, nargs="+", default=[1, 3, 5, 10], help="driver counts of the grid")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 2, 3], help="season counts of the grid")
+    parser.add_argument("--endpoints", nargs="*", help="only these endpoint paths")
+    parser.add_argument("--repeat", type=int, default=3, help="warm requests per cell")
+    parser.add_argument("--field-size", type=int, default=20, help="drivers per synthetic session")
+    parser.add_argument("--laps", type=int, default=57, help="laps per driver in a synthetic session")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "latest.json"))
+    parser.add_argument("--compare", help="results file to check for regressions against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed warm latency increase (fraction)")
+    parser.add_argument("--verbose", action="store_true", help="show the endpoints' own output")
+    args = parser.parse_args()
+
+    if max(args.drivers) > args.field_size or max(args.years) > len(YEARS):
+        parser.error(f"the grid is limited to {args.field_size} drivers and {len(YEARS)} years")
+
+    bench = Bench(args.field_size, args.laps, verbose=args.verbose)
+    from benchmarks.synthetic import DRIVERS
+
+    # Build the sessions up front so that generating them is not measured
+    for year in YEARS[:max(args.years)]:
+        bench.session(year)
+    # Warm-up: imports, the compute process pool and the circuit index are one-off costs
+    bench.request("/api/v1/dashboard", endpoint_params(DRIVERS[:1], YEARS[:1])["/api/v1/dashboard"])
+
+    results = {"meta": _metadata(args), "results": []}
+    for n_drivers in args.drivers:
+        for n_years in args.years:
+            drivers, years = DRIVERS[:n_drivers], YEARS[:n_years]
+            for path, params in endpoint_params(drivers, years).items():
+                if args.endpoints and path not in args.endpoints:
+                    continue
+                row = {"endpoint": path, "drivers": n_drivers, "years": n_years}
+                row.update(bench.measure(path, params, args.repeat, not args.no_memory))
+                results["results"].append(row)
+                print(
+                    f"{path:32} drivers={n_drivers:<3} years={n_years:<2} status={row['status']} "
+                    f"cold={row['cold_ms']:.1f}ms warm={row['warm_ms']}ms cached={row['cached_ms']:.1f}ms "
+                    f"peak={row['peak_mb']}MB"
+                )
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=1)
+    print(f"Wrote {len(results['results'])} results to {args.output}")
+
+    failed = [row for row in results["results"] if row["status"] != 200]
+    for row in failed:
+        print(f"FAILED {row['endpoint']} drivers={row['drivers']} years={row['years']}: status {row['status']}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for row in regressions:
+            print(
+                f"REGRESSION {row['endpoint']} drivers={row['drivers']} years={row['years']}: "
+                f"{row['baseline_warm_ms']}ms -> {row['warm_ms']}ms"
+            )
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,174 @@
+"""Synthetic FastF1 sessions for offline benchmarks.
+
+The sessions have the structure the backend reads (laps table, per-driver car
+and position data on a shared sample clock, results, circuit info) with
+realistic field sizes, lap counts and sample rates, but need no network and
+no FastF1 cache.
+"""
+import copy
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import fastf1.core as ffcore
+import fastf1.events as ffevents
+
+DRIVERS = [
+    "VER", "PER", "HAM", "RUS", "LEC", "SAI", "NOR", "PIA", "ALO", "STR",
+    "GAS", "OCO", "ALB", "SAR", "TSU", "RIC", "BOT", "ZHO", "MAG", "HUL",
+]
+
+T0 = pd.Timestamp("2023-03-05 14:00:00")
+
+
+def _track(length=5400.0, n=2000, seed=0):
+    # A closed loop with a few corners; speed drops with curvature
+    rng = np.random.default_rng(seed)
+    theta = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    r = 1.0 + 0.25 * np.sin(3 * theta + rng.uniform(0, 6)) + 0.1 * np.sin(7 * theta)
+    x, y = r * np.cos(theta), r * np.sin(theta)
+    seg = np.hypot(np.diff(x, append=x[0]), np.diff(y, append=y[0]))
+    scale = length / seg.sum()
+    x, y = x * scale * 10, y * scale * 10  # FastF1 X/Y are in 1/10 m
+    dist = np.concatenate([[0], np.cumsum(seg[:-1] * scale)])
+    curv = np.abs(np.gradient(np.gradient(r)))
+    curv = curv / curv.max()
+    speed = 320 - 240 * curv ** 0.5  # km/h
+    return dist, x, y, speed, length
+
+
+def _event(event, name):
+    return ffevents.Event({
+        "EventName": event, "EventDate": T0, "RoundNumber": 1,
+        "Session1": None, "Session2": None, "Session3": None, "Session4": None,
+        "Session5": name, "Session5Date": T0, "Session5DateUtc": T0,
+        "Country": "", "Location": "", "OfficialEventName": event,
+        "EventFormat": "conventional", "F1ApiSupport": True,
+    })
+
+
+def make_session(year=2023, event="Bahrain Grand Prix", name="Race",
+                 n_drivers=20, n_laps=57, car_hz=3.7, pos_hz=4.0, seed=0):
+    """A loaded `fastf1.core.Session` with `n_drivers` drivers doing `n_laps` laps each.
+
+    Car data is sampled at `car_hz` and position data at `pos_hz`, about the
+    rates of the live timing feed. Lap times vary per driver, lap and `year`.
+    `get_circuit_info()` returns corners at the local speed minima.
+    """
+    rng = np.random.default_rng(seed + year)
+    dist_grid, x_grid, y_grid, speed_grid, length = _track(seed=seed)
+    session = ffcore.Session(_event(event, name), name, f1_api_support=True)
+    # Unique per year, so that channel loaders can tell the sessions apart
+    session.api_path = f"/synthetic/{year}/{event}/{name}/"
+    drivers = DRIVERS[:n_drivers]
+    numbers = [str(i + 1) for i in range(n_drivers)]
+
+    laps_rows = []
+    car_data, pos_data = {}, {}
+    for drv, num in zip(drivers, numbers):
+        skill = rng.normal(1.0, 0.01)
+        t = 60.0  # session time of the start of lap 1, in seconds
+        lap_times = []
+        best = None
+        for lap in range(1, n_laps + 1):
+            v = speed_grid / 3.6 / (skill * rng.normal(1.0, 0.004))
+            dt = np.diff(dist_grid, append=length) / v
+            lap_time = dt.sum()
+            personal_best = best is None or lap_time < best
+            best = lap_time if personal_best else best
+            laps_rows.append({
+                "Time": pd.Timedelta(seconds=t + lap_time), "Driver": drv,
+                "DriverNumber": num, "LapTime": pd.Timedelta(seconds=lap_time),
+                "LapNumber": float(lap), "Stint": 1.0, "IsPersonalBest": personal_best,
+                "Compound": "SOFT", "TyreLife": float(lap), "FreshTyre": True,
+                "Team": "", "LapStartTime": pd.Timedelta(seconds=t),
+                "LapStartDate": T0 + pd.Timedelta(seconds=t), "TrackStatus": "1",
+                "Position": 1.0, "Deleted": False, "DeletedReason": "",
+                "FastF1Generated": False, "IsAccurate": lap > 1,
+                "PitInTime": pd.NaT, "PitOutTime": pd.NaT,
+            })
+            lap_times.append(t + np.concatenate([[0], np.cumsum(dt[:-1])]))
+            t += lap_time
+        end = t
+
+        # Distance along the race as a function of session time
+        all_t = np.concatenate(lap_times + [[end]])
+        all_d = np.concatenate([dist_grid + i * length for i in range(n_laps)] + [[n_laps * length]])
+        for source, hz, out in (("car", car_hz, car_data), ("pos", pos_hz, pos_data)):
+            # All cars share one sample clock per source, as in the live feed
+            times = np.arange(0.0, end + 5, 1.0 / hz) + (0.05 if source == "pos" else 0.0)
+            d = np.interp(times, all_t, all_d, left=0, right=n_laps * length)
+            lap_distance = np.mod(d, length)
+            session_time = pd.to_timedelta(times, unit="s").round("ms")
+            frame = {"Date": T0 + session_time, "SessionTime": session_time, "Time": session_time}
+            if source == "car":
+                speed = np.interp(lap_distance, dist_grid, speed_grid)
+                speed = np.where(times < 60, 0, speed)
+                frame.update({
+                    "Speed": speed.round(0), "RPM": (speed * 35 + 4000).round(0),
+                    "nGear": np.clip((speed / 40).astype(int) + 1, 1, 8),
+                    "Throttle": np.clip((speed - 100) / 2, 0, 100).round(0),
+                    "Brake": np.gradient(speed) < -3,
+                    "DRS": np.where(speed > 290, 12, 1), "Source": "car",
+                })
+            else:
+                frame.update({
+                    "X": np.interp(lap_distance, dist_grid, x_grid).round(0),
+                    "Y": np.interp(lap_distance, dist_grid, y_grid).round(0),
+                    "Z": 0.0, "Status": "OnTrack", "Source": "pos",
+                })
+            out[num] = ffcore.Telemetry(pd.DataFrame(frame), session=session, driver=num)
+
+    session._laps = ffcore.Laps(pd.DataFrame(laps_rows), session=session, _force_default_cols=True)
+    session._car_data = car_data
+    session._pos_data = pos_data
+    session._t0_date = T0
+    session._results = ffcore.SessionResults(
+        pd.DataFrame({"DriverNumber": numbers, "Abbreviation": drivers}),
+        _force_default_cols=True,
+    )
+    session._results.index = numbers
+
+    # The real circuit info comes from the network; put corners at the local speed minima
+    minima = np.where((speed_grid < np.roll(speed_grid, 1)) & (speed_grid <= np.roll(speed_grid, -1)))[0]
+    corners = pd.DataFrame({
+        "X": x_grid[minima], "Y": y_grid[minima],
+        "Number": np.arange(1, len(minima) + 1), "Letter": "", "Angle": 0.0,
+        "Distance": dist_grid[minima],
+    })
+    info = SimpleNamespace(corners=corners, rotation=0.0)
+    session.get_circuit_info = lambda: info
+    return session
+
+
+# Column order of fastf1._api.car_data and position_data
+_RAW_COLUMNS = {
+    "car": ["Time", "Date", "RPM", "Speed", "nGear", "Throttle", "Brake", "DRS", "Source"],
+    "pos": ["Time", "Date", "Status", "X", "Y", "Z", "Source"],
+}
+
+
+def raw_channels(session):
+    """Car and position data of a `make_session` session as `fastf1._api.car_data` / `position_data` return them."""
+    raw = {}
+    for channel, data in (("car", session._car_data), ("pos", session._pos_data)):
+        raw[channel] = {}
+        for drv, tel in data.items():
+            frame = pd.DataFrame(tel)
+            # Time of the live-timing stream, which starts at the session's t0
+            frame["Time"] = frame["Date"] - session._t0_date
+            raw[channel][drv] = frame[_RAW_COLUMNS[channel]]
+    return raw
+
+
+def without_channels(session):
+    """A copy of `session` as `Session.load(telemetry=False)` leaves it: laps and results, no car or position data.
+
+    Its `load` does nothing, so the copy can stand in for `fastf1.get_session(...)`.
+    """
+    bare = copy.copy(session)
+    del bare._car_data, bare._pos_data
+    bare._t0_date = None
+    bare._laps = ffcore.Laps(pd.DataFrame(session._laps), session=bare)
+    bare.load = lambda *args, **kwargs: None
+    return bare
@@ -0,0 +1,153 @@
+"""Materialize FastF1 sessions into the Parquet store read by the API.
+
+Examples (run from the backend directory):
+
+    python ingest.py --year 2024 --sessions R Q
+    python ingest.py --year 2023 --events "Bahrain Grand Prix" "Monaco Grand Prix" --offline
+
+Sessions whose stored data already matches the current ingest hash are skipped.
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fastf1 as ff1
+
+from utils import channel_store, store
+from utils.compact import compact_telemetry
+from utils.sessions import get_loaded_session, session_cache, session_key
+
+
+def _init_worker(cache_dir, offline):
+    os.makedirs(cache_dir, exist_ok=True)
+    ff1.Cache.enable_cache(cache_dir)
+    if offline:
+        ff1.Cache.offline_mode(True)
+
+
+def ingest_hash(key, cache_dir, laps_mode):
+    """Hash of everything the stored files depend on: code versions, options and the raw FastF1 cache files."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "store_version": store.STORE_VERSION,
+        "fastf1": ff1.__version__,
+        "columns": store.TELEMETRY_COLUMNS,
+        "laps": laps_mode,
+    }, sort_keys=True).encode())
+
+    raw_dir = raw_cache_dir(cache_dir, ff1.get_session(*key).api_path)
+    if os.path.isdir(raw_dir):
+        for name in sorted(os.listdir(raw_dir)):
+            if not name.endswith(".ff1pkl"):
+                continue
+            digest.update(name.encode())
+            with open(os.path.join(raw_dir, name), "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def raw_cache_dir(cache_dir, api_path):
+    """Directory of a session's files in the FastF1 cache (which drops the leading "/static/" of the API path)."""
+    return os.path.join(cache_dir, api_path.removeprefix("/static/"))
+
+
+def _selected_laps(session, laps_mode):
+    laps = session.laps
+    if laps_mode == "all":
+        return [lap for _, lap in laps[laps["LapTime"].notna()].iterrows()]
+
+    # Everything the endpoints look up: each driver's fastest lap and the session's fastest quick lap
+    index = session.lap_index
+    if index is None:
+        # Nothing is stored and no manifest written, so the next run retries the session
+        raise RuntimeError(f"the laps of {session} could not be indexed")
+    selected = [index.fastest(driver) for driver in index.drivers]
+    selected.append(index.fastest_quick())
+    unique = {}
+    for lap in selected:
+        if lap is not None:
+            unique[(lap["Driver"], int(lap["LapNumber"]))] = lap
+    return list(unique.values())
+
+
+def ingest_session(key, cache_dir, laps_mode, force):
+    content_hash = ingest_hash(key, cache_dir, laps_mode)
+    manifest = store.read_manifest(key)
+    if not force and manifest is not None and manifest.get("hash") == content_hash:
+        return "up to date"
+
+    # Fetched again rather than mapped from channel files of an older ingest
+    channel_store.remove_channels(key)
+    session = get_loaded_session(*key)
+    try:
+        store.write_laps(key, session.laps)
+        laps = _selected_laps(session, laps_mode)
+        for lap in laps:
+            telemetry = compact_telemetry(lap.get_telemetry().add_distance())
+            store.write_lap_telemetry(key, lap["Driver"], lap["LapNumber"], telemetry)
+    finally:
+        # Each worker handles many sessions; do not keep them around
+        session_cache.pop(key)
+
+    # Loading fetches the raw files on a cold cache: hash what the stored data was built from
+    store.write_manifest(key, {"hash": ingest_hash(key, cache_dir, laps_mode), "laps": len(laps)})
+    return f"ingested {len(laps)} laps"
+
+
+def _event_names(year, events):
+    if events:
+        return events
+    schedule = ff1.get_event_schedule(year, include_testing=False)
+    return list(schedule["EventName"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--events", nargs="*", help="event names; defaults to the whole season")
+    parser.add_argument("--sessions", nargs="+", default=["R"], help="session identifiers, e.g. R Q FP1")
+    parser.add_argument("--laps", choices=["fastest", "all"], default="fastest",
+                        help="which laps to store telemetry for (default: the laps the endpoints use)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache-dir", default="Cache", help="FastF1 cache directory")
+    parser.add_argument("--offline", action="store_true", help="only use the FastF1 cache, never the network")
+    parser.add_argument("--force", action="store_true", help="re-ingest sessions that are up to date")
+    args = parser.parse_args()
+
+    if not store.STORE_ENABLED:
+        parser.error("the Parquet store is disabled (is pyarrow installed?)")
+
+    _init_worker(args.cache_dir, args.offline)
+    keys = [
+        session_key(args.year, name, identifier)
+        for name in _event_names(args.year, args.events)
+        for identifier in args.sessions
+    ]
+
+    failed = 0
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(args.cache_dir, args.offline),
+    ) as pool:
+        futures = {
+            pool.submit(ingest_session, key, args.cache_dir, args.laps, args.force): key
+            for key in keys
+        }
+        for future in as_completed(futures):
+            year, name, identifier = futures[future]
+            try:
+                print(f"{year} {name} {identifier}: {future.result()}")
+            except Exception as e:
+                failed += 1
+                print(f"{year} {name} {identifier}: failed ({e})")
+
+    print(f"Done: {len(keys) - failed}/{len(keys)} sessions")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
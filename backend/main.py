@@ -1,22 +1,51 @@
-from fastapi import FastAPI, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+import asyncio
 import fastf1 as ff1
 import pandas as pd
 import numpy as np
 import os
 import math
 from scipy import interpolate
-from scipy.spatial import cKDTree
 
-from utils.sectors import sector_dict, label_dict
+from utils.analytics import braking_distribution, dominance_stats, lap_gaps
+from utils.braking import lap_bounds_ns
+from utils.circuits import get_circuit
+from utils.compact import compact_labels
+from utils.compute import pack_ragged, run_compute
+from utils.downsample import downsample_series, simplify_path
+from utils.encoding import MEDIA_TYPES, encode, encoded_response, response_format
+from utils.metrics import instrument_requests, render, stage
+from utils.profiling import client_allowed, list_profiles, profile_path, profile_requests
+from utils.minisectors import minisector_times
+from utils.response_cache import cache_responses, mark_uncacheable, response_cache_stats
+from utils.sessions import load_as_completed, load_per_year, load_sessions, session_cache, LAPS_CAR
+from utils.shared_cache import shared_cache
+from utils.telemetry import get_lap_index, get_lap_telemetry, load_lap_indexes, laps_cache, telemetry_cache
+from utils.warmup import start_warmup, warmup_status
 from typing import List
-from functools import lru_cache
 
 cache_dir = "Cache"
 os.makedirs(cache_dir, exist_ok=True)
 ff1.Cache.enable_cache('Cache')
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Loads the configured hot sessions in the background; /ready reports when they are resident
+    start_warmup()
+    yield
+
+app = FastAPI(lifespan=lifespan)
+
+# Registered before CORS so that cached responses get the CORS headers too
+app.middleware("http")(cache_responses(exclude=["/api/v1/cache-stats"]))
+# Outside the response cache, which profiled requests bypass
+app.middleware("http")(profile_requests())
+# Outside the response cache, so that cache hits are timed as well
+app.middleware("http")(instrument_requests())
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,109 +55,181 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@lru_cache(maxsize=128)
-def get_loaded_session(year, name, identifier):
-    s = ff1.get_session(year, name, identifier)
-    s.load()
-    return s
-
 @app.get("/api/v1/")
 def read_root():
     return {"Test F1 Server"}
 
+@app.get("/api/v1/cache-stats")
+def get_cache_stats():
+    return {
+        "sessions": session_cache.stats(),
+        "laps": laps_cache.stats(),
+        "telemetry": telemetry_cache.stats(),
+        "responses": response_cache_stats(),
+        "shared": shared_cache.stats(),
+    }
+
+@app.get("/ready")
+def get_ready():
+    """Readiness for load balancers: 200 once the warm-up sessions are loaded, 503 with progress until then."""
+    status = warmup_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics")
+def get_metrics():
+    # Prometheus text format; outside /api/v1/, so never served from the response cache
+    return PlainTextResponse(render(get_cache_stats()), media_type="text/plain; version=0.0.4")
+
+@app.get("/profiles")
+def get_profiles(request: Request):
+    if not client_allowed(request):
+        raise HTTPException(status_code=403, detail="Profiles are only available to allowed clients")
+    return list_profiles()
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, request: Request):
+    """Collapsed stacks of a request profiled with `profile=1`, for flamegraph.pl or speedscope."""
+    if not client_allowed(request):
+        raise HTTPException(status_code=403, detail="Profiles are only available to allowed clients")
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No profile '{profile_id}'")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
+
+def _driver_telemetry(lap_index, year, session_name, identifier, driver, max_points=None):
+    """Telemetry series of a driver's fastest lap for the telemetry view, or None if there is none."""
+    fastest_lap = lap_index.fastest(driver)
+    if fastest_lap is None:
+        return None
+        
+    car_data = get_lap_telemetry(year, session_name, identifier, fastest_lap)
+    telemetry = pd.DataFrame({
+        "time": car_data["Time"],
+        "distance": car_data["Distance"],
+        "speed": car_data["Speed"],
+        "RPM": car_data["RPM"],
+        "nGear": car_data["nGear"],
+        "Throttle": car_data["Throttle"],
+        "Brake": car_data["Brake"].astype(int),
+        "DRS": car_data["DRS"]
+    })
+    # Shape-preserving reduction; gear, brake and DRS changes are always kept
+    return downsample_series(
+        telemetry, max_points, x="distance",
+        continuous=["speed", "RPM", "Throttle"],
+        discrete=["nGear", "Brake", "DRS"],
+    )
+
+
+def telemetry_view(years, session_name, identifier, drivers, max_points=None):
+    result = {}
+    
+    for year, lap_index in load_lap_indexes(years, session_name, identifier):
+        for driver in drivers:
+            try:
+                telemetry = _driver_telemetry(lap_index, year, session_name, identifier, driver, max_points)
+                if telemetry is None:
+                    continue
+                
+                # Use year_driver as key
+                key = f"{year}_{driver}"
+                result[key] = telemetry
+                
+            except Exception as e:
+                print(f"Error processing driver {driver} in year {year}: {e}")
+                # A partial result must not be served from the response cache
+                mark_uncacheable()
+                continue
+    
+    return result
+
+
+def _stream_telemetry(years, session_name, identifier, drivers, max_points, fmt):
+    # One {"key": "<year>_<driver>", "data": ...} item per driver-year, in the order they become ready;
+    # a driver-year that fails is sent as {"key": ..., "error": "<message>"}
+    def load(year, driver):
+        try:
+            lap_index = get_lap_index(year, session_name, identifier)
+            return {"data": _driver_telemetry(lap_index, year, session_name, identifier, driver, max_points)}
+        except Exception as e:
+            print(f"Error processing driver {driver} in year {year}: {e}")
+            return {"error": str(e)}
+
+    items = [(year, driver) for year in years for driver in drivers]
+    for (year, driver), item in load_as_completed(load, items):
+        if "data" in item and item["data"] is None:
+            continue
+        chunk = encode({"key": f"{year}_{driver}", **item}, fmt)
+        # msgpack objects are self-delimiting; JSON items are newline-delimited
+        yield chunk if fmt == "msgpack" else chunk + b"\n"
+
+
 @app.get("/api/v1/telemetry")
 def get_telemetry(
     session_year: str,
     session_name: str,
     identifier: str,
-    drivers: List[str] = Query(None)
+    drivers: List[str] = Query(None),
+    max_points: int = Query(None, ge=3),
+    stream: bool = Query(False),
+    fmt: str = Depends(response_format)
 ):
     # Parse comma-separated years
     years = [int(y.strip()) for y in session_year.split(",")]
-    
-    result = {}
-    
-    for year in years:
-        try:
-            session = get_loaded_session(year, session_name, identifier)
-            
-            for driver in drivers:
-                try:
-                    fastest_lap = session.laps.pick_drivers(driver).pick_fastest()
-                    if fastest_lap is None:
-                        continue
-                        
-                    car_data = fastest_lap.get_telemetry().add_distance()
-                    telemetry = pd.DataFrame({
-                        "time": car_data["Time"],
-                        "distance": car_data["Distance"],
-                        "speed": car_data["Speed"],
-                        "RPM": car_data["RPM"],
-                        "nGear": car_data["nGear"],
-                        "Throttle": car_data["Throttle"],
-                        "Brake": car_data["Brake"].astype(int),
-                        "DRS": car_data["DRS"]
-                    }).astype(object)
-                    
-                    # Use year_driver as key
-                    key = f"{year}_{driver}"
-                    result[key] = telemetry.to_dict(orient="records")
-                    
-                except Exception as e:
-                    print(f"Error processing driver {driver} in year {year}: {e}")
-                    continue
-                    
-        except Exception as e:
-            print(f"Error loading session for year {year}: {e}")
-            continue
-    
-    return result
-    
-@app.get("/api/v1/gear-data")
-def get_gear_data(session_year: int, session_name: str, identifier: str, driver: str):
-    session = get_loaded_session(session_year, session_name, identifier)
 
-    lap = session.laps.pick_drivers(driver).pick_fastest()
-    telemetry = lap.get_telemetry()
+    if stream:
+        # Streamed bodies are not buffered into the response cache
+        mark_uncacheable()
+        return StreamingResponse(
+            _stream_telemetry(years, session_name, identifier, drivers, max_points, fmt),
+            media_type=MEDIA_TYPES[fmt] if fmt == "msgpack" else "application/x-ndjson",
+        )
+    return encoded_response(telemetry_view(years, session_name, identifier, drivers, max_points), fmt)
+
+
+def gear_view(session_year, session_name, identifier, driver, max_points=None):
+    lap = get_lap_index(session_year, session_name, identifier).fastest(driver)
+    telemetry = get_lap_telemetry(session_year, session_name, identifier, lap)
     
     data = pd.DataFrame({
       "x": telemetry["X"],
       "y": telemetry["Y"],
       "gear": telemetry["nGear"].astype(int)
     })
+    data = simplify_path(data, max_points, x="x", y="y", discrete=["gear"])
     
-    return data.to_dict(orient="records")
+    return data
 
 
-@app.get("/api/v1/track-dominance")
-def get_track_dominance(
-    session_name: str, 
-    identifier: str,  
-    drivers: list[str] = Query(None), 
-    session_years: list[int] = Query(None)
+@app.get("/api/v1/gear-data")
+def get_gear_data(
+    session_year: int,
+    session_name: str,
+    identifier: str,
+    driver: str,
+    max_points: int = Query(None, ge=3),
+    fmt: str = Depends(response_format)
 ):
+    return encoded_response(gear_view(session_year, session_name, identifier, driver, max_points), fmt)
+
+
+def _load_dominance_laps(session_name, identifier, drivers, session_years):
+    """Distance / time arrays of each selected fastest lap, the reference lap telemetry and its circuit metadata."""
     telemetry_list = []
     
     # Tracking the actual fastest lap object for reference X/Y data
     fastest_lap_object = None
+    fastest_lap_year = None
     global_fastest_time = None
-    
-    if not drivers or not session_years:
-        return []
 
     ### ---- Load telemetry data ---- ###
-    for year in session_years:
-        session_event = get_loaded_session(year, session_name, identifier)
-        
-        # Pre-load laps for all requested drivers in this session to avoid repeated filtering
-        driver_laps = session_event.laps.pick_drivers(drivers)
-
+    for year, lap_index in load_lap_indexes(session_years, session_name, identifier):
         for driver in drivers:
-            # Extract specific driver's fastest lap safely
-            driver_lap = driver_laps.pick_drivers(driver).pick_fastest()
+            # Driver's fastest lap from the session's lap index
+            driver_lap = lap_index.fastest(driver)
             
             # Check if valid lap exists
-            if pd.isna(driver_lap['LapTime']):
+            if driver_lap is None or pd.isna(driver_lap['LapTime']):
                 continue
 
             # Update Global Fastest Lap for Reference Telemetry
@@ -136,165 +237,131 @@ def get_track_dominance(
             if global_fastest_time is None or current_time < global_fastest_time:
                 global_fastest_time = current_time
                 fastest_lap_object = driver_lap
-
-            # Process Telemetry
-            telemetry = driver_lap.get_telemetry().add_distance()
-            telemetry["Driver"] = driver
-            telemetry["Year"] = year
-            telemetry["DriverYear"] = f"{driver}_{year}"
-            
-            # Keep only necessary columns to save memory
-            cols_to_keep = ['Date', 'SessionTime', 'Driver', 'Year', 'DriverYear', 'Distance', 'Speed', 'X', 'Y']
-            telemetry_list.append(telemetry[cols_to_keep])
+                fastest_lap_year = year
+
+            # Distance / time arrays of the lap for the minisector engine
+            telemetry = get_lap_telemetry(year, session_name, identifier, driver_lap)
+            telemetry_list.append({
+                "driver_year": f"{driver}_{year}",
+                "driver": driver,
+                "year": year,
+                "distance": telemetry['Distance'].to_numpy(),
+                "time": telemetry['SessionTime'].dt.total_seconds().to_numpy(),
+            })
 
     if not telemetry_list or fastest_lap_object is None:
-        return []
-
-    # Concatenate all telemetry data
-    telemetry_all = pd.concat(telemetry_list, ignore_index=True)
+        return None
 
     # Set Reference Telemetry (The actual spatial path of the fastest lap)
-    reference_telemetry = driver_lap.get_telemetry().add_distance()
+    reference_telemetry = get_lap_telemetry(
+        fastest_lap_year, session_name, identifier, fastest_lap_object
+    )[['Distance', 'Speed', 'X', 'Y']].copy()
     # Note: We do not overwrite Driver/Year here to preserve the identity of the reference lap
 
-    # ---- Mini Sector Logic ---- #
-    if session_name in sector_dict:
-        sector_bounds = sector_dict[session_name]
-    else:
-        num_minisectors = 12
-        total_dist = telemetry_all['Distance'].max()
-        # Create n+1 linspace bounds
-        sector_bounds = np.linspace(0, total_dist, num_minisectors + 1)
+    circuit = get_circuit(fastest_lap_year, session_name, identifier)
+    return telemetry_list, reference_telemetry, circuit
+
+
+async def track_dominance_view(session_name, identifier, drivers, session_years):
+    if not drivers or not session_years:
+        return []
+
+    loaded = await run_in_threadpool(_load_dominance_laps, session_name, identifier, drivers, session_years)
+    if loaded is None:
+        return []
+    telemetry_list, reference_telemetry, circuit = loaded
 
-    sector_bounds = [round(s,0) for s in sector_bounds]
+    # ---- Mini Sectors and Labels ---- #
+    sector_bounds = circuit["bounds"]
+    labels = circuit["labels"]
 
     # Assign Minisectors
-    telemetry_all['Minisector'] = np.digitize(
-        telemetry_all['Distance'], bins=sector_bounds, right=False
-    )
     reference_telemetry['Minisector'] = np.digitize(
         reference_telemetry['Distance'], bins=sector_bounds, right=False
     )
 
-    # ---- Sector Labels ---- #
-    if session_name in label_dict:
-        labels = label_dict.get(session_name, {})
-    else:
-        # Calculate labels based on min speed in reference telemetry per sector
-        sector_speeds = reference_telemetry.groupby('Minisector')['Speed'].min()
-        labels = {}
-        for minisector, speed in sector_speeds.items():
-            if minisector > num_minisectors:
-                break
-            elif speed < 100:
-                labels[minisector] = 'Slow'
-            elif speed < 200:
-                labels[minisector] = 'Medium'
-            elif speed < 260:
-                labels[minisector] = 'Fast'
-            else:
-                labels[minisector] = 'Straight'
-        
-
     # ---- Dominance Calculation ---- #
-    # Group by Sector and Driver, calculate Duration (Max SessionTime - Min SessionTime)
-    sector_times = telemetry_all.groupby(['Minisector', 'DriverYear'])['SessionTime'].agg(lambda x: x.max() - x.min()).reset_index()
-    sector_times.rename(columns={'SessionTime': 'TimeInSector'}, inplace=True)
-    
-    # Find Fastest Driver per Sector
-    idx_fastest = sector_times.groupby('Minisector')['TimeInSector'].idxmin()
-    fastest_per_sector = sector_times.loc[idx_fastest, ['Minisector', 'DriverYear', 'TimeInSector']]
-    fastest_per_sector.rename(columns={'DriverYear': 'Fastest', 'TimeInSector': 'FastestTime'}, inplace=True)
-
-    # Calculate Average Time of Everyone excluding the fastest
-    # Merge fastest info back to sector times to exclude them from the mean calculation
-    sector_analysis = sector_times.merge(fastest_per_sector[['Minisector', 'Fastest']], on='Minisector')
-    
-    # Filter out the fastest driver to calculate the mean of the rest
-    others_times = sector_analysis[sector_analysis['DriverYear'] != sector_analysis['Fastest']]
-    
-    # Calculate Mean of others
-    mean_others = others_times.groupby('Minisector')['TimeInSector'].mean().reset_index()
-    mean_others.rename(columns={'TimeInSector': 'MeanTimeOthers'}, inplace=True)
-
-    # Consolidate Stats
-    stats_merged = fastest_per_sector.merge(mean_others, on='Minisector', how='left')
-    stats_merged['TimeGainFastest'] = stats_merged['MeanTimeOthers'] - stats_merged['FastestTime']
-    
-    # Handle cases where there is only 1 driver (MeanTimeOthers would be NaN)
-    stats_merged['TimeGainFastest'] = stats_merged['TimeGainFastest'].fillna(0)
-
-    # ---- Final Result Construction ---- #
-    
-    # Merge stats onto spatial reference
-    result_telemetry = reference_telemetry.merge(
-        stats_merged[['Minisector', 'Fastest', 'TimeGainFastest']], 
-        on='Minisector', 
-        how='left'
+    # Time of every lap in every minisector, on the compute executor
+    distance, offsets = pack_ragged([entry["distance"] for entry in telemetry_list])
+    time, _ = pack_ragged([entry["time"] for entry in telemetry_list])
+    fastest_idx, time_gain = await run_compute(
+        dominance_stats,
+        {"distance": distance, "time": time, "offsets": offsets},
+        bounds=sector_bounds,
     )
 
-    # Map Labels
-    result_telemetry['Label'] = result_telemetry['Minisector'].map(labels)
-
-    # Parse Driver and Year from "Fastest" string
-    result_telemetry["Driver"] = result_telemetry["Fastest"].str.split('_').str[0]
-    result_telemetry["Year"] = result_telemetry["Fastest"].str.split('_').str[1].astype(int)
-
-
-    result_telemetry['TimeGainFastest'] = pd.to_timedelta(result_telemetry['TimeGainFastest'], errors='coerce')
-    result_telemetry['TimeGainFastest'] = result_telemetry["TimeGainFastest"].dt.total_seconds().map('{:.3f}'.format)
-
-    # Final selection
-    result = pd.DataFrame({
-        "x": result_telemetry["X"],
-        "y": result_telemetry["Y"],
-        "minisector": result_telemetry["Minisector"],
-        "fastest": result_telemetry["Fastest"],
-        "driver": result_telemetry["Driver"],
-        "year": result_telemetry["Year"],
-        "TimeGainFastest": result_telemetry["TimeGainFastest"],
-        "Label": result_telemetry["Label"]
+    # One row per minisector; the labels are categoricals, so the merge below
+    # repeats small codes instead of a string per telemetry sample
+    minisectors = np.arange(1, len(fastest_idx) + 1)
+    driver_years = np.array([entry["driver_year"] for entry in telemetry_list])
+    fastest_drivers = np.array([entry["driver"] for entry in telemetry_list])
+    fastest_years = np.array([entry["year"] for entry in telemetry_list], dtype=np.int16)
+    stats_merged = pd.DataFrame({
+        "Minisector": minisectors,
+        "Fastest": compact_labels(driver_years[fastest_idx]),
+        "Driver": compact_labels(fastest_drivers[fastest_idx]),
+        "Year": fastest_years[fastest_idx],
+        "TimeGainFastest": compact_labels(['{:.3f}'.format(gain) for gain in time_gain]),
+        "Label": compact_labels(pd.Series(minisectors).map(labels)),
     })
 
-    return result.to_dict(orient='records')
+    # ---- Final Result Construction ---- #
+    with stage("merge"):
+        # Merge stats onto spatial reference
+        result_telemetry = reference_telemetry.merge(stats_merged, on='Minisector', how='left')
+
+        # Final selection
+        result = pd.DataFrame({
+            "x": result_telemetry["X"],
+            "y": result_telemetry["Y"],
+            "minisector": result_telemetry["Minisector"],
+            "fastest": result_telemetry["Fastest"],
+            "driver": result_telemetry["Driver"],
+            "year": result_telemetry["Year"],
+            "TimeGainFastest": result_telemetry["TimeGainFastest"],
+            "Label": result_telemetry["Label"]
+        })
+
+    return result
 
 
+@app.get("/api/v1/track-dominance")
+async def get_track_dominance(
+    session_name: str, 
+    identifier: str,  
+    drivers: list[str] = Query(None), 
+    session_years: list[int] = Query(None),
+    fmt: str = Depends(response_format)
+):
+    return encoded_response(await track_dominance_view(session_name, identifier, drivers, session_years), fmt)
 
 
 ### ---- Braking Comparison ---- ####
 
-@app.get("/api/v1/braking-comparison")
-def braking_comparison(
-    session_year: str,
-    session_name: str,
-    identifier: str,
-    drivers: str
-):
-    years = [int(y.strip()) for y in session_year.split(",")]
-    driver_codes = [d.strip() for d in drivers.split(",")]
-    
+def braking_comparison_view(years, session_name, identifier, driver_codes):
     # Find the overall fastest lap across ALL drivers (not just selected ones)
     fastest_lap = None
     fastest_time = float('inf')
     fastest_driver = None
     fastest_year = None
     
-    for year in years:
+    session_laps = load_lap_indexes(years, session_name, identifier)
+
+    for year, lap_index in session_laps:
         try:
-            session = get_loaded_session(year, session_name, identifier)
-            # Get fastest lap from ALL drivers in the session
-            all_laps = session.laps.pick_quicklaps()  # Filter for quick laps only
-            if len(all_laps) > 0:
-                fastest_session_lap = all_laps.pick_fastest()
-                if fastest_session_lap is not None:
-                    lap_time = fastest_session_lap['LapTime'].total_seconds()
-                    if lap_time < fastest_time:
-                        fastest_time = lap_time
-                        fastest_lap = fastest_session_lap
-                        fastest_driver = fastest_session_lap['Driver']
-                        fastest_year = year
+            # Get fastest quick lap from ALL drivers in the session
+            fastest_session_lap = lap_index.fastest_quick()
+            if fastest_session_lap is not None:
+                lap_time = fastest_session_lap['LapTime'].total_seconds()
+                if lap_time < fastest_time:
+                    fastest_time = lap_time
+                    fastest_lap = fastest_session_lap
+                    fastest_driver = fastest_session_lap['Driver']
+                    fastest_year = year
         except Exception as e:
             print(f"Error loading session {year}: {e}")
+            # A partial result must not be served from the response cache
+            mark_uncacheable()
             continue
     
     if fastest_lap is None:
@@ -303,7 +370,7 @@ def braking_comparison(
     print(f"Ideal lap: {fastest_driver} from {fastest_year} with time {fastest_time}s")
     
     # Get ACTUAL brake telemetry from the fastest lap
-    ideal_telemetry = fastest_lap.get_telemetry().add_distance()
+    ideal_telemetry = get_lap_telemetry(fastest_year, session_name, identifier, fastest_lap)
     ideal_brake = ideal_telemetry["Brake"].astype(int).values  
     ideal_distance = ideal_telemetry["Distance"].values
     
@@ -326,19 +393,18 @@ def braking_comparison(
             "driver": fastest_driver,
             "year": fastest_year
         })
-        all_results["ideal"] = df.to_dict(orient="records")
+        all_results["ideal"] = df
     
     # Now get each driver's brake data
-    for year in years:
+    for year, lap_index in session_laps:
         try:
-            session = get_loaded_session(year, session_name, identifier)
             for driver_code in driver_codes:
-                lap = session.laps.pick_drivers(driver_code).pick_fastest()
+                lap = lap_index.fastest(driver_code)
                 
                 if lap is None:
                     continue
                 
-                telemetry = lap.get_telemetry().add_distance()
+                telemetry = get_lap_telemetry(year, session_name, identifier, lap)
                 driver_brake = telemetry["Brake"].astype(int).values
                 distance = telemetry["Distance"].values
                 
@@ -361,61 +427,104 @@ def braking_comparison(
                 
                 # Use the year_driver format as key (matching frontend expectations)
                 key = f"{year}_{driver_code}"
-                all_results[key] = df.to_dict(orient="records")
+                all_results[key] = df
                 
         except Exception as e:
             print(f"Error processing {year}/{driver_code}: {e}")
+            # A partial result must not be served from the response cache
+            mark_uncacheable()
             continue
     
     return all_results
 
-@app.get("/api/v1/braking-distribution")
-def get_braking_distribution(
-    session_year: str, 
+
+@app.get("/api/v1/braking-comparison")
+def braking_comparison(
+    session_year: str,
     session_name: str,
     identifier: str,
-    drivers: List[str] = Query(None)
+    drivers: str,
+    fmt: str = Depends(response_format)
 ):
-    # Parse comma-separated years
     years = [int(y.strip()) for y in session_year.split(",")]
-    
-    output = []
+    driver_codes = [d.strip() for d in drivers.split(",")]
+    return encoded_response(braking_comparison_view(years, session_name, identifier, driver_codes), fmt)
 
-    for year in years:
-        try:
-            session = get_loaded_session(year, session_name, identifier)
-            
-            # Use only real laps
-            laps = session.laps.pick_accurate().pick_not_deleted().pick_wo_box()
 
+def _load_braking_inputs(years, session_name, identifier, drivers):
+    """Car data and real laps of every (driver, year), as `[(driver, year, car_data, laps), ...]`."""
+    inputs = []
+
+    for year, session in load_sessions(years, session_name, identifier, profile=LAPS_CAR):
+        try:
             for driver in drivers:
-                driver_laps = laps.pick_drivers(driver)
-
-                for _, lap in driver_laps.iterrows():
-                    try:
-                        car = lap.get_car_data().add_distance().copy()
-                        car["Brake"] = car["Brake"].astype(float)
-                        car["dDist"] = car["Distance"].diff().fillna(0)
-                        braking_distance = car.loc[car["Brake"] > 0.5, "dDist"].sum()
-
-                        output.append({
-                            "driver": driver,
-                            "year": year,
-                            "lap": int(lap["LapNumber"]),
-                            "braking_distance": float(braking_distance)
-                        })
-                    except Exception:
-                        continue
+                # Use only real laps
+                driver_laps = session.lap_index.real_laps(driver)
+                if driver_laps.empty:
+                    continue
+
+                car_data = session.car_data.get(driver_laps["DriverNumber"].iloc[0])
+                if car_data is None:
+                    continue
+
+                inputs.append((driver, year, car_data, driver_laps))
         except Exception as e:
             print(f"Error processing year {year}: {e}")
+            # A partial result must not be served from the response cache
+            mark_uncacheable()
             continue
 
-    return {"data": output}
-    return result.to_dict(orient="records")
+    return inputs
 
 
-@app.get("/api/v1/AvgDiffs")
-def get_average_loss_to_fastest(session_name: str, identifier: str, drivers: list[str] = Query(None), session_years: list[int] = Query(None)):
+async def braking_distribution_view(years, session_name, identifier, drivers):
+    columns = ["driver", "year", "lap", "braking_distance"]
+    inputs = await run_in_threadpool(_load_braking_inputs, years, session_name, identifier, drivers)
+    if not inputs:
+        return {"data": pd.DataFrame(columns=columns)}
+
+    # All laps of every driver in one pass over their session's car data, on the compute executor
+    bounds = [lap_bounds_ns(driver_laps) for _, _, _, driver_laps in inputs]
+    session_ns, sample_offsets = pack_ragged(
+        [car_data["SessionTime"].to_numpy().astype("timedelta64[ns]").astype(np.int64) for _, _, car_data, _ in inputs],
+        dtype=np.int64,
+    )
+    speed, _ = pack_ragged([car_data["Speed"].to_numpy() for _, _, car_data, _ in inputs])
+    brake, _ = pack_ragged([car_data["Brake"].to_numpy() for _, _, car_data, _ in inputs])
+    start_ns, lap_offsets = pack_ragged([start for _, start, _ in bounds], dtype=np.int64)
+    end_ns, _ = pack_ragged([end for _, _, end in bounds], dtype=np.int64)
+
+    distances = await run_compute(braking_distribution, {
+        "session_ns": session_ns, "speed": speed, "brake": brake, "sample_offsets": sample_offsets,
+        "start_ns": start_ns, "end_ns": end_ns, "lap_offsets": lap_offsets,
+    })
+
+    output = [
+        pd.DataFrame({
+            "driver": driver,
+            "year": year,
+            "lap": driver_laps["LapNumber"].to_numpy()[valid][has_samples].astype(int),
+            "braking_distance": distance[has_samples],
+        })
+        for (driver, year, _, driver_laps), (valid, _, _), (has_samples, distance) in zip(inputs, bounds, distances)
+    ]
+    return {"data": pd.concat(output, ignore_index=True)[columns]}
+
+
+@app.get("/api/v1/braking-distribution")
+async def get_braking_distribution(
+    session_year: str, 
+    session_name: str,
+    identifier: str,
+    drivers: List[str] = Query(None),
+    fmt: str = Depends(response_format)
+):
+    # Parse comma-separated years
+    years = [int(y.strip()) for y in session_year.split(",")]
+    return encoded_response(await braking_distribution_view(years, session_name, identifier, drivers), fmt)
+
+
+def avg_diffs_view(session_name, identifier, drivers, session_years):
     telemetry_list = []
     
     # Track overall fastest lap
@@ -430,12 +539,9 @@ def get_average_loss_to_fastest(session_name: str, identifier: str, drivers: lis
         return []
 
     ### ---- Load telemetry data ---- ###
-    for year in session_years:
-        session_event = get_loaded_session(year, session_name, identifier)
-        driver_laps = session_event.laps.pick_drivers(drivers)
-
+    for year, lap_index in load_lap_indexes(session_years, session_name, identifier):
         for driver in drivers:
-            lap = driver_laps.pick_drivers(driver).pick_fastest()
+            lap = lap_index.fastest(driver)
             current_time = lap['LapTime']
 
             if global_fastest_time is None or current_time < global_fastest_time:
@@ -444,118 +550,84 @@ def get_average_loss_to_fastest(session_name: str, identifier: str, drivers: lis
                 fastest_driver_overall = driver
                 fastest_year_overall = year
 
-            telemetry = lap.get_telemetry().add_distance()
-            telemetry["Driver"] = driver
-            telemetry["Year"] = year
-            telemetry["DriverYear"] = f"{driver}_{year}"
+            telemetry = get_lap_telemetry(year, session_name, identifier, lap)
 
             # Only keep columns needed for calculation
-            cols = ['SessionTime', 'Distance', 'Speed', 'DriverYear']
-            telemetry_list.append(telemetry[cols])
+            telemetry_list.append({
+                "driver_year": f"{driver}_{year}",
+                "distance": telemetry['Distance'].to_numpy(),
+                "time": telemetry['SessionTime'].dt.total_seconds().to_numpy(),
+            })
 
     if not telemetry_list or fastest_lap_object is None:
         return []
 
-    # Concatenate all telemetry data
-    telemetry_all = pd.concat(telemetry_list, ignore_index=True)
-
-    # Get correct reference telemetry (from the actual fastest lap)
-    reference_telemetry = lap.get_telemetry().add_distance()
-
-    ### ---- Get mini sectors ---- ###
-    if session_name in sector_dict:
-        sector_bounds = sector_dict[session_name]
-    else:
-        num_minisectors = 12
-        total_dist = telemetry_all['Distance'].max()
-        sector_bounds = np.linspace(0, total_dist, num_minisectors + 1)
-
-    # Digitize both all telemetry and the reference telemetry
-    telemetry_all['Minisector'] = np.digitize(
-        telemetry_all['Distance'], bins=sector_bounds, right=False
-    )
-    
-    reference_telemetry['Minisector'] = np.digitize(
-        reference_telemetry['Distance'], bins=sector_bounds, right=False
-    )
-
-    ### ---- Add mini sector labels ---- ### 
-    
-    if session_name in label_dict:
-        labels = label_dict.get(session_name, {})
-    else:
-        # Calculate labels based on the VALID reference telemetry
-        sector_speeds = telemetry_all.groupby('Minisector')['Speed'].min()
-
-        labels = {}
-        for minisector, speed in sector_speeds.items():
-            if speed < 110:
-                labels[minisector] = 'Slow'
-            elif speed < 200:
-                labels[minisector] = 'Medium'
-            elif speed < 260:
-                labels[minisector] = 'Fast'
-            else:
-                labels[minisector] = 'Straight'
-        
-
-    # Add labels to main dataframe
-    telemetry_all['MinisectorLabel'] = telemetry_all['Minisector'].map(labels)
+    ### ---- Get mini sectors and their labels ---- ###
+    circuit = get_circuit(fastest_year_overall, session_name, identifier)
+    sector_bounds = circuit["bounds"]
+    labels = circuit["labels"]
 
     ### ---- Calculate Time Spent per Sector ---- ###
-    sector_analysis = (
-        telemetry_all
-        .groupby(['Minisector', 'MinisectorLabel', 'DriverYear'])['SessionTime']
-        .agg(lambda x: x.max() - x.min())
-        .dt.total_seconds()
-        .reset_index()
-        .rename(columns={'SessionTime': 'Time_sec'})
-    )
-
-    ### ---- Calculate Diff to Fastest ---- ###
-
-    # Identify the unique string for the fastest driver
-    fastest_str = f"{fastest_driver_overall}_{fastest_year_overall}"
-
-    # Extract fastest driver times
-    fastest_times = sector_analysis[sector_analysis['DriverYear'] == fastest_str][['Minisector', 'Time_sec']]
-    
-    # Merge fastest times back into the main dataframe
-    sector_analysis = sector_analysis.merge(
-        fastest_times,
-        on='Minisector',
-        suffixes=('', '_Fastest'),
-        how='left'
+    sector_times = minisector_times(
+        [entry["distance"] for entry in telemetry_list],
+        [entry["time"] for entry in telemetry_list],
+        sector_bounds,
     )
+    n_laps, n_sectors = sector_times.shape
+    sector_analysis = pd.DataFrame({
+        "Minisector": np.tile(np.arange(1, n_sectors + 1), n_laps),
+        "DriverYear": compact_labels(np.repeat([entry["driver_year"] for entry in telemetry_list], n_sectors)),
+        "Time_sec": sector_times.ravel(),
+    })
 
-    # Calculate difference
-    sector_analysis['Diff_to_Fastest_sec'] = sector_analysis['Time_sec'] - sector_analysis['Time_sec_Fastest']
+    # Sectors without a label are left out of the comparison
+    sector_analysis['MinisectorLabel'] = compact_labels(sector_analysis['Minisector'].map(labels))
+    sector_analysis = sector_analysis.dropna(subset=['MinisectorLabel'])
 
-    ### ---- Aggregate by Label ---- ###
-    # Find the average time loss per minisector label for each driver
-    result_df = (
-        sector_analysis
-        .groupby(['MinisectorLabel', 'DriverYear'])['Diff_to_Fastest_sec']
-        .mean()
-        .reset_index()
-    )
-
-    result_df['Diff_to_Fastest_sec'] = result_df['Diff_to_Fastest_sec'].round(3)
+    ### ---- Calculate Diff to Fastest ---- ###
+    with stage("merge"):
+        # Identify the unique string for the fastest driver
+        fastest_str = f"{fastest_driver_overall}_{fastest_year_overall}"
+
+        # Extract fastest driver times
+        fastest_times = sector_analysis[sector_analysis['DriverYear'] == fastest_str][['Minisector', 'Time_sec']]
+    
+        # Merge fastest times back into the main dataframe
+        sector_analysis = sector_analysis.merge(
+            fastest_times,
+            on='Minisector',
+            suffixes=('', '_Fastest'),
+            how='left'
+        )
+
+        # Calculate difference
+        sector_analysis['Diff_to_Fastest_sec'] = sector_analysis['Time_sec'] - sector_analysis['Time_sec_Fastest']
+
+        ### ---- Aggregate by Label ---- ###
+        # Find the average time loss per minisector label for each driver
+        result_df = (
+            sector_analysis
+            .groupby(['MinisectorLabel', 'DriverYear'], observed=True)['Diff_to_Fastest_sec']
+            .mean()
+            .reset_index()
+        )
+
+        result_df['Diff_to_Fastest_sec'] = result_df['Diff_to_Fastest_sec'].round(3)
 
     # Add metadata columns
     result_df['FastestOverallDriver'] = fastest_driver_overall
     result_df['FastestOverallYear'] = fastest_year_overall
 
-    return result_df.to_dict(orient='records')
+    return result_df
 
 
-@app.get("/api/v1/lap-gap-evolution")
-def get_lap_gap_evolution(
-    session_name: str, 
-    identifier: str,  
-    drivers: List[str] = Query(None), 
-    session_years: List[int] = Query(None)
-):
+@app.get("/api/v1/AvgDiffs")
+def get_average_loss_to_fastest(session_name: str, identifier: str, drivers: list[str] = Query(None), session_years: list[int] = Query(None), fmt: str = Depends(response_format)):
+    return encoded_response(avg_diffs_view(session_name, identifier, drivers, session_years), fmt)
+
+
+def _load_lap_gap_laps(session_name, identifier, drivers, session_years):
+    """Telemetry arrays of each selected fastest lap and the index of the overall fastest one (-1 if none)."""
     # Container to hold valid lap data
     lap_data_list = []
     
@@ -563,34 +635,27 @@ def get_lap_gap_evolution(
     global_fastest_time = None
     ref_index = -1 
 
-    ### ---- Load Data ---- ###
-    if not drivers or not session_years:
-        return {"lapGaps": {}, "corners": []}
-
-    for year in session_years:
+    for year, lap_index in load_lap_indexes(session_years, session_name, identifier):
         try:
-            session_event = get_loaded_session(year, session_name, identifier)
-            driver_laps = session_event.laps.pick_drivers(drivers)
-
             for driver in drivers:
-                lap = driver_laps.pick_drivers(driver).pick_fastest()
+                lap = lap_index.fastest(driver)
 
                 if pd.isna(lap['LapTime']):
                     continue
                 
                 lap_time = lap['LapTime']
-                telemetry = lap.get_telemetry().add_distance()
+                telemetry = get_lap_telemetry(year, session_name, identifier, lap)
                 
                 entry = {
                     "driver": driver,
                     "year": year,
                     "driver_year": f"{driver} {year}", 
                     "time": lap_time,
+                    "lap_number": int(lap['LapNumber']),
                     "x_coord": telemetry['X'].values,
                     "y_coord": telemetry['Y'].values,
                     "distance": telemetry['Distance'].values,
                     "time_series": telemetry['Time'].dt.total_seconds().values,
-                    "session": session_event 
                 }
                 
                 lap_data_list.append(entry)
@@ -600,108 +665,150 @@ def get_lap_gap_evolution(
                     ref_index = len(lap_data_list) - 1
         except Exception as e:
             print(f"Error processing {year}: {e}")
+            # A partial result must not be served from the response cache
+            mark_uncacheable()
             continue
 
+    return lap_data_list, ref_index
+
+
+async def lap_gap_view(session_name, identifier, drivers, session_years):
+    ### ---- Load Data ---- ###
+    if not drivers or not session_years:
+        return {"lapGaps": {}, "corners": []}
+
+    lap_data_list, ref_index = await run_in_threadpool(
+        _load_lap_gap_laps, session_name, identifier, drivers, session_years
+    )
     if not lap_data_list or ref_index == -1:
         return {"lapGaps": {}, "corners": []}
 
     ### ---- Prepare Reference Data ---- ###
     reference_entry = lap_data_list[ref_index]
-    ref_time_series = reference_entry["time_series"]
-    ref_distance = reference_entry["distance"]
     ref_id = reference_entry["driver_year"]
-    
-    # KDTree for spatial matching
-    ref_coords = np.column_stack((reference_entry["x_coord"], reference_entry["y_coord"]))
-    ref_tree = cKDTree(ref_coords)
+    compared = [entry for entry in lap_data_list if entry["driver_year"] != ref_id]
 
-    result = {}
-    
     # Configuration
     TARGET_POINTS = 800 
     SMOOTHING_WINDOW = 15
     
     ### ---- Calculate Gaps ---- ###
-    for entry in lap_data_list:
+    # Map-matching onto the reference lap runs on the compute executor, which
+    # keeps the reference lap's spatial index between requests
+    reference_key = (
+        reference_entry["year"], session_name, identifier,
+        reference_entry["driver"], reference_entry["lap_number"],
+    )
+    x, offsets = pack_ragged([entry["x_coord"] for entry in compared])
+    y, _ = pack_ragged([entry["y_coord"] for entry in compared])
+    distance, _ = pack_ragged([entry["distance"] for entry in compared])
+    time, _ = pack_ragged([entry["time_series"] for entry in compared])
+    gaps = await run_compute(lap_gaps, {
+        "ref_x": reference_entry["x_coord"],
+        "ref_y": reference_entry["y_coord"],
+        "ref_distance": reference_entry["distance"],
+        "ref_time": reference_entry["time_series"],
+        "x": x, "y": y, "distance": distance, "time": time, "offsets": offsets,
+    }, target_points=TARGET_POINTS, smoothing_window=SMOOTHING_WINDOW, reference_key=reference_key)
+
+    result = {}
+    for entry, (gap_x, gap_y) in zip(compared, gaps):
         driver_year = entry["driver_year"]
-        
-        if driver_year == ref_id:
-            continue
-            
-        d_x = entry["x_coord"]
-        d_y = entry["y_coord"]
-        d_dist = entry["distance"]
-        d_time = entry["time_series"]
-        
-        # 1. Downsample INPUT data
-        if len(d_x) > TARGET_POINTS:
-            step = len(d_x) // TARGET_POINTS
-            d_x = d_x[::step]
-            d_y = d_y[::step]
-            d_dist = d_dist[::step]
-            d_time = d_time[::step]
-
-        driver_coords = np.column_stack((d_x, d_y))
-        
-        # 2. Spatial Query
-        dists, indices = ref_tree.query(driver_coords, k=2)
-        
-        # 3. Disambiguate Matches
-        idx_0 = indices[:, 0]
-        idx_1 = indices[:, 1]
-        
-        ref_d_0 = ref_distance[idx_0]
-        ref_d_1 = ref_distance[idx_1]
-        
-        delta_0 = np.abs(ref_d_0 - d_dist)
-        delta_1 = np.abs(ref_d_1 - d_dist)
-        
-        use_second = (delta_0 > 500) & (delta_1 < 500)
-        chosen_indices = np.where(use_second, idx_1, idx_0)
-        
-        # 4. Calculate Raw Gap
-        ref_time_at_match = ref_time_series[chosen_indices]
-        gap_series_raw = d_time - ref_time_at_match
-        
-        # 5. Apply Smoothing
-        gap_series_smooth = pd.Series(gap_series_raw).rolling(
-            window=SMOOTHING_WINDOW, 
-            center=True, 
-            min_periods=1
-        ).mean().values
-        
-        x_axis_dist = ref_distance[chosen_indices]
-        
-        lap_gap = pd.DataFrame({
-            "x": x_axis_dist,
-            "y": gap_series_smooth,
+        result[driver_year] = pd.DataFrame({
+            "x": gap_x,
+            "y": gap_y,
             "driver": driver_year[:3], 
             "year": int(entry["year"])
         })
 
-        lap_gap = lap_gap.sort_values(by="x").dropna()
-        
-        # Trim edges to remove artifacts
-        # Remove 10 points from start/end (approx covers the smoothing window radius)
-        if len(lap_gap) > 20:
-            lap_gap = lap_gap.iloc[10:-10]
-    
-        result[driver_year] = lap_gap.to_dict(orient="records")
-
     ### ---- Get Circuit Info ---- ###
-    ref_session = reference_entry["session"]
-    circuit_info = ref_session.get_circuit_info()
-    
-    corners = []
-    if circuit_info is not None:
-        for _, corner in circuit_info.corners.iterrows():
-            corners.append({
-                "distance": float(corner["Distance"]),
-                "label": f"{corner['Number']}{corner['Letter']}"
-            })
+    circuit = await run_in_threadpool(get_circuit, reference_entry["year"], session_name, identifier)
+    corners = circuit["corners"] or []
 
     return {
         "lapGaps": result,
         "corners": corners,  
         "fastest_driver": ref_id,
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/api/v1/lap-gap-evolution")
+async def get_lap_gap_evolution(
+    session_name: str, 
+    identifier: str,  
+    drivers: List[str] = Query(None), 
+    session_years: List[int] = Query(None),
+    fmt: str = Depends(response_format)
+):
+    return encoded_response(await lap_gap_view(session_name, identifier, drivers, session_years), fmt)
+
+### ---- Dashboard ---- ###
+
+DASHBOARD_VIEWS = (
+    "telemetry", "gear-data", "track-dominance", "braking-comparison",
+    "braking-distribution", "AvgDiffs", "lap-gap-evolution",
+)
+
+
+def _prefetch_year(year, session_name, identifier, drivers):
+    # Telemetry of the laps the views share: each driver's fastest lap and the session's fastest quick lap
+    lap_index = get_lap_index(year, session_name, identifier)
+    selected = [lap_index.fastest(driver) for driver in drivers]
+    selected.append(lap_index.fastest_quick())
+    for lap in selected:
+        if lap is not None and not pd.isna(lap['LapTime']):
+            get_lap_telemetry(year, session_name, identifier, lap)
+
+
+@app.get("/api/v1/dashboard")
+async def get_dashboard(
+    session_name: str,
+    identifier: str,
+    drivers: List[str] = Query(None),
+    session_years: List[int] = Query(None),
+    views: List[str] = Query(None),
+    max_points: int = Query(None, ge=3),
+    gear_driver: str = Query(None),
+    gear_year: int = Query(None),
+    fmt: str = Depends(response_format)
+):
+    """Several views of one selection in a single response, as `{view: payload}`.
+
+    `views` are endpoint names (default: all of them) and each payload has the
+    shape of that endpoint's response. The gear map is for `gear_driver` in
+    `gear_year`, by default the first driver code alphabetically and the
+    earliest year: `drivers` and `session_years` are sets, their order does
+    not matter (nor does it in the response cache key). Laps and fastest-lap telemetry are loaded once, then the
+    views run concurrently from the shared caches.
+    """
+    views = views or list(DASHBOARD_VIEWS)
+    unknown = [view for view in views if view not in DASHBOARD_VIEWS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown views {unknown}, expected some of {DASHBOARD_VIEWS}")
+    if not drivers or not session_years:
+        raise HTTPException(status_code=400, detail="drivers and session_years are required")
+
+    gear_driver = gear_driver or min(drivers)
+    gear_year = gear_year or min(session_years)
+
+    await run_in_threadpool(load_per_year, _prefetch_year, session_years, session_name, identifier, drivers=drivers)
+
+    computations = {
+        "telemetry": lambda: run_in_threadpool(telemetry_view, session_years, session_name, identifier, drivers, max_points),
+        "gear-data": lambda: run_in_threadpool(gear_view, gear_year, session_name, identifier, gear_driver, max_points),
+        "track-dominance": lambda: track_dominance_view(session_name, identifier, drivers, session_years),
+        "braking-comparison": lambda: run_in_threadpool(braking_comparison_view, session_years, session_name, identifier, drivers),
+        "braking-distribution": lambda: braking_distribution_view(session_years, session_name, identifier, drivers),
+        "AvgDiffs": lambda: run_in_threadpool(avg_diffs_view, session_name, identifier, drivers, session_years),
+        "lap-gap-evolution": lambda: lap_gap_view(session_name, identifier, drivers, session_years),
+    }
+    results = await asyncio.gather(*(computations[view]() for view in views), return_exceptions=True)
+
+    dashboard = {}
+    for view, result in zip(views, results):
+        if isinstance(result, Exception):
+            print(f"Error computing {view}: {result}")
+            mark_uncacheable()
+            result = {"error": str(result)}
+        dashboard[view] = result
+    return encoded_response(dashboard, fmt)
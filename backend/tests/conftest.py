@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+# Settings are read when the modules are imported: keep the tests away from the real store and caches
+_tmp = tempfile.mkdtemp(prefix="davi-tests-")
+os.environ["TELEMETRY_STORE_DIR"] = os.path.join(_tmp, "Store")
+os.environ["CIRCUIT_INDEX_PATH"] = os.path.join(_tmp, "circuits.json")
+os.environ["COMPUTE_WORKERS"] = "0"
+os.environ.pop("RESPONSE_CACHE_DIR", None)
+os.environ.pop("CACHE_BACKEND", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main.py creates and enables the FastF1 cache relative to the working directory
+os.chdir(_tmp)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def synthetic_api(monkeypatch, tmp_path):
+    """Serve synthetic sessions where FastF1 would fetch them, with an empty store and empty caches."""
+    import fastf1 as ff1
+
+    from benchmarks.synthetic import make_session, raw_channels, without_channels
+    from utils import response_cache, sessions, store, telemetry
+
+    made = {}
+
+    def session(year):
+        if year not in made:
+            made[year] = make_session(year=year, n_drivers=3, n_laps=4)
+        return made[year]
+
+    def loader(channel):
+        def load(api_path):
+            source = next(s for s in made.values() if s.api_path == api_path)
+            return raw_channels(source)[channel]
+        return load
+
+    monkeypatch.setattr(ff1, "get_session", lambda year, name, identifier: without_channels(session(int(year))))
+    monkeypatch.setattr(sessions, "_CHANNEL_LOADERS", {"car": loader("car"), "pos": loader("pos")})
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path))
+    caches = [sessions.session_cache, telemetry.laps_cache, telemetry.telemetry_cache, response_cache.response_cache]
+    for cache in caches:
+        cache.clear()
+    yield session
+    for cache in caches:
+        cache.clear()
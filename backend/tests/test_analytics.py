@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from utils.analytics import lap_gaps, match_tolerance
+from utils.compute import pack_ragged
+
+
+def _circle(radius, n, lap_time):
+    angle = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    distance = radius * angle
+    return radius * np.cos(angle), radius * np.sin(angle), distance, np.linspace(0, lap_time, n, endpoint=False)
+
+
+def _arrays(reference, laps):
+    ref_x, ref_y, ref_distance, ref_time = reference
+    packed = [pack_ragged([lap[i] for lap in laps]) for i in range(4)]
+    return {
+        "ref_x": ref_x, "ref_y": ref_y, "ref_distance": ref_distance, "ref_time": ref_time,
+        "x": packed[0][0], "y": packed[1][0], "distance": packed[2][0], "time": packed[3][0],
+        "offsets": packed[0][1],
+    }
+
+
+def test_match_tolerance_follows_the_reference_lap():
+    # 5 km sampled every 4 m: a share of the length
+    assert match_tolerance(np.arange(0, 5000, 4.0)) == pytest.approx(0.05 * 4996)
+    # Sparse samples: at least the span of the candidate samples
+    assert match_tolerance(np.arange(0, 1000, 50.0)) == pytest.approx(200.0)
+
+
+def test_lap_gaps_on_a_short_lap():
+    reference = _circle(100, 600, 30.0)
+    x, y, distance, time = reference
+    slower = (x, y, distance, time * 1.1)
+    [(gap_x, gap)] = lap_gaps(_arrays(reference, [slower]), target_points=50, smoothing_window=1)
+    assert len(gap_x) == 50
+    assert np.all(np.diff(gap_x) >= 0)
+    assert gap == pytest.approx(0.1 * np.interp(gap_x, distance, time), abs=1e-6)
+
+
+def test_lap_gaps_keep_peaks():
+    reference = _circle(800, 5000, 90.0)
+    x, y, distance, time = reference
+    # A one-sample moment lost mid-lap, that striding every n-th sample would skip
+    lost = time + np.where(np.arange(len(time)) == 2503, 0.5, 0.0)
+    [(gap_x, gap)] = lap_gaps(_arrays(reference, [(x, y, distance, lost)]), target_points=100, smoothing_window=1)
+    assert len(gap_x) == 100
+    assert gap.max() == pytest.approx(0.5)
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_session
+from utils.braking import lap_braking_distances
+
+
+def _per_lap(laps):
+    # The per-lap path the endpoint used before
+    rows = []
+    for _, lap in laps.iterrows():
+        try:
+            car = lap.get_car_data().add_distance().copy()
+        except Exception:
+            continue
+        car["Brake"] = car["Brake"].astype(float)
+        car["dDist"] = car["Distance"].diff().fillna(0)
+        rows.append({"lap": int(lap["LapNumber"]), "braking_distance": float(car.loc[car["Brake"] > 0.5, "dDist"].sum())})
+    return pd.DataFrame(rows, columns=["lap", "braking_distance"])
+
+
+@pytest.fixture(scope="module")
+def session():
+    return make_session(n_drivers=3, n_laps=6)
+
+
+def test_matches_per_lap_car_data(session):
+    for driver in session.laps["Driver"].unique():
+        laps = session.laps.pick_drivers(driver)
+        car_data = session.car_data[laps["DriverNumber"].iloc[0]]
+        expected = _per_lap(laps)
+        result = lap_braking_distances(car_data, laps)
+        assert len(expected) > 0
+        assert result["lap"].tolist() == expected["lap"].tolist()
+        assert result["braking_distance"].to_numpy() == pytest.approx(expected["braking_distance"].to_numpy(), abs=1e-6)
+
+
+def test_laps_without_samples_or_times_are_left_out(session):
+    laps = session.laps.pick_drivers(session.laps["Driver"].iloc[0]).copy()
+    car_data = session.car_data[laps["DriverNumber"].iloc[0]]
+    laps.loc[laps.index[1], "LapStartTime"] = pd.NaT
+    # A lap after the end of the car data
+    laps.loc[laps.index[2], ["LapStartTime", "Time"]] = car_data["SessionTime"].iloc[-1] + pd.to_timedelta([1, 2], unit="s")
+    result = lap_braking_distances(car_data, laps)
+    assert result["lap"].tolist() == [n for i, n in enumerate(laps["LapNumber"].astype(int)) if i not in (1, 2)]
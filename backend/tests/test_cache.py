@@ -0,0 +1,143 @@
+import gc
+import threading
+import time
+import weakref
+
+import pytest
+
+from utils.cache import ByteBudgetCache
+
+
+def _cache(max_bytes=10):
+    # Values are their own size in bytes
+    return ByteBudgetCache(max_bytes, sizeof=lambda value: value)
+
+
+def test_evicts_least_recently_used_first():
+    cache = _cache()
+    cache.put("a", 4)
+    cache.put("b", 4)
+    cache.get("a")
+    cache.put("c", 4)
+    assert list(cache._entries) == ["a", "c"]
+    assert cache.stats()["bytes"] == 8
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicts_until_within_budget():
+    cache = _cache()
+    for key in "abcde":
+        cache.put(key, 2)
+    cache.put("big", 9)
+    assert list(cache._entries) == ["big"]
+    assert cache.stats()["evictions"] == 5
+
+    # Replacing a key counts only its new size
+    cache.put("big", 3)
+    cache.put("small", 7)
+    assert cache.total_bytes == 10 and len(cache) == 2
+
+
+def test_pinned_entries_survive_eviction():
+    cache = _cache()
+    cache.pin("pinned")
+    cache.put("pinned", 6)
+    cache.put("a", 3)
+    cache.put("b", 3)
+    assert "pinned" in cache and "a" not in cache and "b" in cache
+
+    # Pinned entries count towards the budget, even over it
+    cache.put("c", 6)
+    assert list(cache._entries) == ["pinned"]
+    assert cache.stats()["pinned"] == ["pinned"]
+
+    cache.put("pinned", 12)
+    assert cache.total_bytes == 12
+    cache.unpin("pinned")
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+
+def test_counters():
+    cache = _cache()
+    assert cache.get("a") is None
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    assert cache.peek("a") == 1 and cache.peek("b") is None
+    assert cache.get_or_load("a", lambda: 2) == 1
+    assert cache.get_or_load("b", lambda: 2) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"], stats["bytes"]) == (2, 2, 0, 2, 3)
+    assert cache.pop("a") == 1 and cache.pop("a", "gone") == "gone"
+    assert cache.stats()["bytes"] == 2
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+
+
+def test_session_upgrade_lock_leaves_with_the_session(synthetic_api):
+    from utils import sessions
+
+    key = (2023, "Bahrain Grand Prix", "R")
+    session = sessions.get_loaded_session(*key, profile=sessions.LAPS)
+    sessions.get_loaded_session(*key, profile=sessions.LAPS_CAR)
+    assert "car" in sessions.loaded_channels(session)
+
+    # Nothing outside the cached session keeps its upgrade lock
+    lock = weakref.ref(session._upgrade_lock)
+    sessions.session_cache.pop(key)
+    del session
+    gc.collect()
+    assert lock() is None
+
+
+def test_failing_loader_is_retried():
+    cache = ByteBudgetCache(1000, sizeof=lambda value: 1)
+    with pytest.raises(ValueError):
+        cache.get_or_load("key", lambda: (_ for _ in ()).throw(ValueError("no data")))
+    assert cache.get_or_load("key", lambda: "value") == "value"
+    assert cache.stats()["loading"] == 0
+
+
+def test_failing_sizeof_does_not_leave_the_key_in_flight():
+    sizes = iter([TypeError("unsized"), 1])
+
+    def sizeof(value):
+        size = next(sizes)
+        if isinstance(size, Exception):
+            raise size
+        return size
+
+    cache = ByteBudgetCache(1000, sizeof=sizeof)
+    loading = threading.Event()
+    release = threading.Event()
+
+    def loader():
+        loading.set()
+        release.wait()
+        return "value"
+
+    errors = []
+
+    def wait_for_load():
+        try:
+            cache.get_or_load("key", lambda: "other")
+        except TypeError as e:
+            errors.append(e)
+
+    owner = threading.Thread(target=lambda: pytest.raises(TypeError, cache.get_or_load, "key", loader), daemon=True)
+    owner.start()
+    loading.wait()
+    waiter = threading.Thread(target=wait_for_load, daemon=True)
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()["coalesced"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert cache.stats()["coalesced"] == 1
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+    assert not waiter.is_alive()
+
+    # The waiter got the owner's error, and the next call loads again
+    assert len(errors) == 1
+    assert cache.stats()["loading"] == 0
+    assert cache.get_or_load("key", lambda: "again") == "again"
@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+from utils import circuits
+from utils.shared_cache import LocalBackend
+
+EVENT = (2023, "Bahrain Grand Prix", "R")
+
+
+@pytest.fixture
+def index(synthetic_api, monkeypatch, tmp_path):
+    path = str(tmp_path / "circuits.json")
+    monkeypatch.setattr(circuits, "CIRCUIT_INDEX_PATH", path)
+    monkeypatch.setattr(circuits, "_index", {})
+    monkeypatch.setattr(circuits, "shared_cache", LocalBackend(1 << 20))
+    return path
+
+
+def _no_build(*args):
+    raise AssertionError("circuit built again")
+
+
+def test_circuit_is_persisted_and_read_back(index, monkeypatch):
+    meta = circuits.get_circuit(*EVENT)
+    assert len(meta["bounds"]) > 2
+    assert meta["corners"] and all(set(corner) == {"distance", "label"} for corner in meta["corners"])
+    assert all(isinstance(m, int) for m in meta["labels"])
+
+    with open(index) as f:
+        assert list(json.load(f)) == ["2023/Bahrain Grand Prix"]
+
+    # A new process reads the file at startup, with minisector numbers as ints again
+    monkeypatch.setattr(circuits, "_build_circuit", _no_build)
+    monkeypatch.setattr(circuits, "_index", circuits._read_index())
+    assert circuits.get_circuit(*EVENT) == meta
+
+
+def test_circuit_round_trips_through_the_shared_cache(index, monkeypatch):
+    meta = circuits.get_circuit(*EVENT)
+
+    # Another worker, without the index file, gets the entry another one built
+    os.remove(index)
+    monkeypatch.setattr(circuits, "_index", {})
+    monkeypatch.setattr(circuits, "_build_circuit", _no_build)
+    assert circuits.get_circuit(*EVENT) == meta
+    assert not os.path.exists(index)
+
+
+def test_circuit_without_corners_is_not_kept(index, monkeypatch):
+    def no_session(*key):
+        raise OSError("no circuit info")
+
+    monkeypatch.setattr(circuits, "get_loaded_session", no_session)
+    assert circuits.get_circuit(*EVENT)["corners"] is None
+    assert not os.path.exists(index)
+    assert circuits.shared_cache.get("circuit/2023/Bahrain Grand Prix") is None
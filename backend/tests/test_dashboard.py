@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+
+import main
+from utils import response_cache
+
+SELECTION = {"session_name": "Bahrain Grand Prix", "identifier": "R", "views": "gear-data"}
+
+
+def _gear_map(client, driver, year=2023):
+    response = client.get("/api/v1/gear-data", params={**SELECTION, "session_year": year, "driver": driver})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_gear_map_does_not_depend_on_the_order_of_drivers(synthetic_api):
+    client = TestClient(main.app)
+    first = client.get("/api/v1/dashboard", params={**SELECTION, "drivers": ["VER", "PER"], "session_years": 2023})
+    second = client.get("/api/v1/dashboard", params={**SELECTION, "drivers": ["PER", "VER"], "session_years": 2023})
+    assert first.status_code == second.status_code == 200
+    assert len(response_cache.response_cache) == 1
+    assert first.content == second.content
+
+    # Both are the gear map of the default driver, computed afresh
+    response_cache.response_cache.clear()
+    assert second.json()["gear-data"] == _gear_map(client, "PER")
+
+
+def test_gear_driver_and_year(synthetic_api):
+    client = TestClient(main.app)
+    params = {**SELECTION, "drivers": ["PER", "VER"], "session_years": [2023, 2024]}
+    dashboard = client.get("/api/v1/dashboard", params={**params, "gear_driver": "VER", "gear_year": 2024})
+    assert dashboard.status_code == 200
+    assert dashboard.json()["gear-data"] == _gear_map(client, "VER", 2024)
+    assert dashboard.json()["gear-data"] != _gear_map(client, "PER", 2023)
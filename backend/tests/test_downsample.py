@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.downsample import downsample_series, simplify_path
+
+
+def _lap(n=4000, gear_every=7, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 90, n)
+    return pd.DataFrame({
+        "Distance": np.cumsum(rng.uniform(1, 2, n)),
+        "Speed": 200 + 80 * np.sin(t) + rng.normal(0, 2, n),
+        "Throttle": np.clip(100 * np.sin(t / 3), 0, 100),
+        "nGear": (np.arange(n) // gear_every) % 8 + 1,
+        "Brake": (np.arange(n) // 50) % 2 == 0,
+        "X": 1000 * np.cos(t / 14),
+        "Y": 800 * np.sin(t / 14),
+    })
+
+
+@pytest.mark.parametrize("gear_every", [7, 40, 400])
+@pytest.mark.parametrize("max_points", [3, 10, 100, 1000])
+def test_downsample_series_caps_rows(max_points, gear_every):
+    lap = _lap(gear_every=gear_every)
+    out = downsample_series(lap, max_points, "Distance", ["Speed", "Throttle"], ["nGear", "Brake"])
+    assert len(out) <= max_points
+    assert out.index[0] == 0 and out.index[-1] == len(lap) - 1
+
+
+@pytest.mark.parametrize("gear_every", [7, 400])
+@pytest.mark.parametrize("max_points", [3, 100, 1000])
+def test_simplify_path_caps_rows(max_points, gear_every):
+    lap = _lap(gear_every=gear_every)
+    out = simplify_path(lap, max_points, "X", "Y", discrete=["nGear"])
+    assert len(out) <= max_points
+
+
+def test_downsample_series_keeps_both_sides_of_changes_that_fit():
+    lap = _lap(gear_every=400)
+    out = downsample_series(lap, 200, "Distance", ["Speed"], ["nGear"])
+    changes = np.flatnonzero(np.diff(lap["nGear"].to_numpy()))
+    assert set(changes) | set(changes + 1) <= set(out.index)
+
+
+def test_downsample_series_keeps_changes_after_when_over_budget():
+    lap = _lap(gear_every=40)
+    out = downsample_series(lap, 250, "Distance", ["Speed"], ["nGear"])
+    changes = np.flatnonzero(np.diff(lap["nGear"].to_numpy()))
+    assert len(out) <= 250
+    assert set(changes + 1) <= set(out.index)
+
+
+def test_short_frames_are_unchanged():
+    lap = _lap(n=50)
+    assert downsample_series(lap, 100, "Distance", ["Speed"], ["nGear"]) is lap
+    assert downsample_series(lap, None, "Distance", ["Speed"], ["nGear"]) is lap
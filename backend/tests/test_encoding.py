@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import encoding
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_module(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(encoding, "orjson", None)
+    elif encoding.orjson is None:
+        pytest.skip("orjson is not installed")
+
+
+def _frame():
+    return pd.DataFrame({
+        "speed": np.array([265.77777, np.nan, 0.1, -3e-7], dtype=np.float32),
+        "time": [1.5, 2.25, np.nan, 1 / 3],
+        "gear": np.array([1, 2, 3, 4], dtype=np.int8),
+        "brake": [True, False, True, False],
+        "driver": pd.Categorical(["VER", "HAM", None, "VER"]),
+        "label": ["a,b", 'say "%s"', "", "x"],
+        "date": pd.to_datetime(["2024-03-02 15:00:00", "2024-03-02 15:00:01.5", None, "2024-03-02 15:01:00"], format="ISO8601"),
+        "lap": pd.to_timedelta([90.5, 91, np.nan, 92], unit="s"),
+    })
+
+
+def test_records_match_pandas(json_module):
+    frame = _frame()
+    expected = json.loads(encoding._prepare(frame).to_json(orient="records", date_format="iso", double_precision=15))
+    records = json.loads(encoding.encode(frame, "records"))
+    assert len(records) == len(expected)
+    for row, expected_row in zip(records, expected):
+        assert list(row) == list(expected_row)
+        for name, value in row.items():
+            if isinstance(value, float):
+                assert value == pytest.approx(expected_row[name], rel=1e-6)
+            else:
+                assert value == expected_row[name]
+
+
+def test_float32_written_at_float32_precision(json_module):
+    frame = _frame()[["speed"]]
+    assert encoding.encode(frame.iloc[:3], "records") == b'[{"speed":265.77777},{"speed":null},{"speed":0.1}]'
+    columns = json.loads(encoding.encode(frame, "columns"))
+    assert columns["speed"][:3] == [265.77777, None, 0.1]
+    assert np.float32(columns["speed"][3]) == np.float32(-3e-7)
+
+
+def test_columns_shape(json_module):
+    frame = _frame()
+    columns = json.loads(encoding.encode({"data": frame, "n": [np.int64(1)]}, "columns"))
+    assert list(columns["data"]) == list(frame.columns)
+    assert columns["data"]["gear"] == [1, 2, 3, 4]
+    assert columns["data"]["driver"] == ["VER", "HAM", None, "VER"]
+    assert columns["data"]["label"][1] == 'say "%s"'
+    assert columns["n"] == [1]
+
+
+def test_empty_frame(json_module):
+    assert json.loads(encoding.encode(_frame().iloc[:0], "records")) == []
+    assert json.loads(encoding.encode(_frame().iloc[:0], "columns"))["speed"] == []
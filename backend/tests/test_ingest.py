@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+import ingest
+from benchmarks.synthetic import make_session
+
+KEY = (2023, "Bahrain Grand Prix", "R")
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    session = make_session(n_drivers=1, n_laps=1)
+    session.api_path = "/static/2023/2023-03-05_Bahrain_Grand_Prix/2023-03-05_Race/"
+    monkeypatch.setattr(ingest.ff1, "get_session", lambda *key: session)
+    raw_dir = ingest.raw_cache_dir(str(tmp_path), session.api_path)
+    os.makedirs(raw_dir)
+    for name in ("car_data.ff1pkl", "position_data.ff1pkl"):
+        with open(os.path.join(raw_dir, name), "wb") as f:
+            f.write(b"cached " + name.encode())
+    return str(tmp_path)
+
+
+def test_raw_cache_dir_drops_static_prefix():
+    path = ingest.raw_cache_dir("Cache", "/static/2023/2023-03-05_Bahrain_Grand_Prix/2023-03-05_Race/")
+    assert path == os.path.join("Cache", "2023/2023-03-05_Bahrain_Grand_Prix/2023-03-05_Race/")
+
+
+def test_hash_changes_with_cache_file(cache_dir):
+    before = ingest.ingest_hash(KEY, cache_dir, "fastest")
+    assert ingest.ingest_hash(KEY, cache_dir, "fastest") == before
+
+    raw_dir = ingest.raw_cache_dir(cache_dir, ingest.ff1.get_session(*KEY).api_path)
+    with open(os.path.join(raw_dir, "car_data.ff1pkl"), "wb") as f:
+        f.write(b"refreshed car data")
+    assert ingest.ingest_hash(KEY, cache_dir, "fastest") != before
+
+
+def test_hash_ignores_other_files(cache_dir):
+    before = ingest.ingest_hash(KEY, cache_dir, "fastest")
+    raw_dir = ingest.raw_cache_dir(cache_dir, ingest.ff1.get_session(*KEY).api_path)
+    with open(os.path.join(raw_dir, "notes.txt"), "w") as f:
+        f.write("not FastF1 data")
+    assert ingest.ingest_hash(KEY, cache_dir, "fastest") == before
+
+
+def test_selected_laps_without_index():
+    session = make_session(n_drivers=1, n_laps=2)
+    session.lap_index = None
+    with pytest.raises(RuntimeError):
+        ingest._selected_laps(session, "fastest")
+
+
+def test_manifest_hash_covers_files_fetched_by_the_load(cache_dir, monkeypatch, tmp_path):
+    session = ingest.ff1.get_session(*KEY)
+    raw_dir = ingest.raw_cache_dir(cache_dir, session.api_path)
+
+    def load(*key):
+        # A cold cache: loading writes another raw file
+        with open(os.path.join(raw_dir, "timing_app_data.ff1pkl"), "wb") as f:
+            f.write(b"fetched")
+        return session
+
+    monkeypatch.setattr(ingest.store, "STORE_DIR", str(tmp_path / "Store"))
+    monkeypatch.setattr(ingest, "get_loaded_session", load)
+    monkeypatch.setattr(ingest, "_selected_laps", lambda session, laps_mode: [])
+    assert ingest.ingest_session(KEY, cache_dir, "fastest", force=False) == "ingested 0 laps"
+    assert ingest.ingest_session(KEY, cache_dir, "fastest", force=False) == "up to date"
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+from fastf1 import exceptions
+from fastf1.core import Laps
+
+from benchmarks.synthetic import make_session
+from utils.lap_index import LapIndex
+
+
+@pytest.fixture(scope="module")
+def laps():
+    session = make_session(n_drivers=4, n_laps=8)
+    frame = pd.DataFrame(session.laps)
+    drivers = frame["Driver"].unique()
+
+    def row(driver, lap_number):
+        return frame.index[(frame["Driver"] == driver) & (frame["LapNumber"] == lap_number)][0]
+
+    # Two drivers tie on their best lap: the first clocked one is the fastest
+    best = frame.loc[frame["IsPersonalBest"] == True, "LapTime"].min() - pd.Timedelta(seconds=1)  # noqa: E712
+    for driver, lap_number in ((drivers[1], 5), (drivers[0], 6)):
+        frame.loc[row(driver, lap_number), ["LapTime", "IsPersonalBest"]] = [best, True]
+    frame.loc[row(drivers[2], 3), ["Deleted", "IsPersonalBest"]] = [True, False]
+    frame.loc[row(drivers[2], 4), "PitInTime"] = frame.loc[row(drivers[2], 4), "Time"]
+    frame.loc[row(drivers[2], 5), "PitOutTime"] = frame.loc[row(drivers[2], 5), "LapStartTime"]
+    frame.loc[row(drivers[3], 2), "LapTime"] = pd.NaT
+    frame.loc[row(drivers[3], 7), "IsAccurate"] = False
+    return Laps(frame, session=session)
+
+
+def _same(lap, expected):
+    if expected is None or (isinstance(expected, pd.Series) and expected.empty):
+        return lap is None
+    return lap is not None and lap.name == expected.name
+
+
+def test_driver_laps_match_pick_drivers(laps):
+    index = LapIndex(laps)
+    assert index.drivers == list(laps["Driver"].unique())
+    for driver in index.drivers:
+        number = laps.pick_drivers(driver)["DriverNumber"].iloc[0]
+        for key in (driver, driver.lower(), number, int(number)):
+            assert index.driver_laps(key).index.equals(laps.pick_drivers(driver).index)
+    assert index.driver_laps("XXX").empty
+
+
+def test_fastest_matches_pick_fastest(laps):
+    index = LapIndex(laps)
+    assert _same(index.fastest(), laps.pick_fastest())
+    assert _same(index.fastest_quick(), laps.pick_quicklaps().pick_fastest())
+    for driver in index.drivers:
+        assert _same(index.fastest(driver), laps.pick_drivers(driver).pick_fastest())
+    assert index.fastest("XXX") is None
+
+
+def test_fastest_quick_without_quick_personal_bests(laps):
+    # The session's quickest lap is not a personal best and sets the 107% line below every personal best
+    frame = pd.DataFrame(laps)
+    frame.loc[frame.index[0], ["LapTime", "IsPersonalBest"]] = [frame["LapTime"].min() * 0.5, False]
+    laps = Laps(frame, session=laps.session)
+    assert LapIndex(laps).fastest_quick() is None
+    assert _same(None, laps.pick_quicklaps().pick_fastest())
+
+
+def test_real_laps_match_pick_chain(laps):
+    index = LapIndex(laps)
+    expected = laps.pick_accurate().pick_not_deleted().pick_wo_box()
+    assert index.real_laps().index.equals(expected.index)
+    for driver in index.drivers:
+        assert index.real_laps(driver).index.equals(expected.pick_drivers(driver).index)
+
+    without_deleted = Laps(pd.DataFrame(laps).drop(columns="Deleted"), session=laps.session)
+    with pytest.raises(exceptions.DataNotLoadedError):
+        LapIndex(without_deleted).real_laps()
+
+
+def test_lap_by_number(laps):
+    index = LapIndex(laps)
+    driver = index.drivers[0]
+    expected = laps.pick_drivers(driver)
+    assert index.lap(driver, 3).name == expected[expected["LapNumber"] == 3].index[0]
+    assert index.lap(driver, 99) is None
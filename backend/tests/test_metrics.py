@@ -0,0 +1,75 @@
+import re
+
+from fastapi.testclient import TestClient
+
+import main
+from utils import metrics
+
+PARAMS = {"session_year": "2023", "session_name": "Bahrain Grand Prix", "identifier": "R", "drivers": ["VER", "PER"]}
+
+
+def _server_timing(response):
+    stages = {}
+    for part in response.headers["Server-Timing"].split(", "):
+        name, duration = re.match(r'^([\w-]+);dur=([0-9.]+)(;desc="x\d+")?$', part).group(1, 2)
+        stages[name] = float(duration)
+    return stages
+
+
+def _sample(text, name, **labels):
+    """Value of the sample `name` whose labels include `labels`, or None."""
+    for line in text.splitlines():
+        match = re.match(r"^(\w+)(?:\{(.*)\})? (\S+)$", line)
+        if match is None or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2) or ""))
+        if all(found.get(k) == str(v) for k, v in labels.items()):
+            return float(match.group(3))
+    return None
+
+
+def test_server_timing_and_prometheus_metrics(synthetic_api):
+    client = TestClient(main.app)
+    endpoint = "/api/v1/telemetry"
+    before = client.get("/metrics").text
+    requests = _sample(before, "davi_request_duration_seconds_count", endpoint=endpoint, status=200) or 0
+
+    cold = client.get(endpoint, params=PARAMS)
+    assert cold.status_code == 200
+    stages = _server_timing(cold)
+    assert {"response-cache", "session-load", "telemetry", "encode", "total"} <= set(stages)
+    assert stages["total"] >= max(duration for name, duration in stages.items() if name != "total")
+    assert cold.headers["Timing-Allow-Origin"] == "*"
+
+    # Served from the response cache: no telemetry stage any more
+    cached = client.get(endpoint, params=PARAMS)
+    assert "telemetry" not in _server_timing(cached)
+
+    text = client.get("/metrics").text
+    assert text.endswith("\n")
+    assert _sample(text, "davi_request_duration_seconds_count", endpoint=endpoint, status=200) == requests + 2
+    assert _sample(text, "davi_request_duration_seconds_bucket", endpoint=endpoint, status=200, le="+Inf") == requests + 2
+    assert _sample(text, "davi_stage_duration_seconds_count", endpoint=endpoint, stage="telemetry") >= 1
+    assert _sample(text, "davi_response_cache_requests_total", endpoint=endpoint, result="hit") >= 1
+    assert _sample(text, "davi_response_bytes_count", endpoint=endpoint) >= 1
+    for cache in ("sessions", "laps", "telemetry", "responses", "shared"):
+        assert _sample(text, "davi_cache_entries", cache=cache) is not None
+    assert 0 < _sample(text, "davi_cache_hit_ratio", cache="responses") <= 1
+
+
+def test_unknown_paths_share_one_label(synthetic_api):
+    client = TestClient(main.app)
+    client.get("/no/such/path")
+    assert _sample(client.get("/metrics").text, "davi_request_duration_seconds_count", endpoint="other", status=404) >= 1
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("h", "help", labels=("endpoint",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, endpoint="/x")
+    text = "\n".join(histogram.render())
+    assert _sample(text, "h_bucket", le="0.1") == 1
+    assert _sample(text, "h_bucket", le="1.0") == 3
+    assert _sample(text, "h_bucket", le="+Inf") == 4
+    assert _sample(text, "h_sum") == 6.05
+    assert _sample(text, "h_count") == 4
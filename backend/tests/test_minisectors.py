@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_session
+from utils.minisectors import crossing_times, minisector_times
+
+
+def _grouped(distances, times, bounds):
+    # The digitize / groupby max - min path track dominance and AvgDiffs used before
+    frame = pd.concat(
+        [pd.DataFrame({"lap": i, "Distance": d, "Time": t}) for i, (d, t) in enumerate(zip(distances, times))],
+        ignore_index=True,
+    )
+    frame["Minisector"] = np.digitize(frame["Distance"], bins=bounds, right=False)
+    grouped = frame.groupby(["lap", "Minisector"])["Time"]
+    return grouped.max() - grouped.min(), grouped.min(), grouped.max()
+
+
+@pytest.fixture(scope="module")
+def laps():
+    session = make_session(n_drivers=3, n_laps=4)
+    distances, times = [], []
+    for _, lap in session.laps.iterrows():
+        car = lap.get_car_data().add_distance()
+        distances.append(car["Distance"].to_numpy())
+        times.append(car["SessionTime"].dt.total_seconds().to_numpy())
+    return distances, times
+
+
+def test_sector_times_add_the_gaps_between_sectors(laps):
+    distances, times = laps
+    bounds = np.round(np.linspace(0, min(d.max() for d in distances), 13))
+    result = minisector_times(distances, times, bounds)
+    duration, first, last = _grouped(distances, times, bounds)
+
+    assert result.shape == (len(distances), len(bounds))
+    for i, (d, t) in enumerate(zip(distances, times)):
+        # Sectors add up to the lap time
+        assert result[i].sum() == pytest.approx(t[-1] - t[0])
+        for sector in range(1, len(bounds)):
+            # The grouped duration misses at most the sample intervals on either side of the sector
+            old = duration[i, sector]
+            before = last[i, sector - 1] if (i, sector - 1) in last.index else first[i, sector]
+            after = first[i, sector + 1] if (i, sector + 1) in first.index else last[i, sector]
+            assert old - 1e-9 <= result[i, sector - 1] <= old + (first[i, sector] - before) + (after - last[i, sector]) + 1e-9
+
+
+def test_samples_on_the_bounds_match_grouping_plus_gaps():
+    bounds = np.array([0.0, 100.0, 200.0, 300.0])
+    distance = np.arange(0, 401, 20.0)
+    time = np.cumsum(np.r_[0, np.full(len(distance) - 1, 0.4)])
+    result = minisector_times([distance], [time], bounds)[0]
+    duration, first, _ = _grouped([distance], [time], bounds)
+    # Each sector also gets the step to the first sample of the next one
+    expected = [duration[0, s] + 0.4 for s in (1, 2, 3)] + [duration[0, 4]]
+    assert result == pytest.approx(expected)
+
+
+def test_fastest_lap_per_sector_matches_grouping():
+    rng = np.random.default_rng(0)
+    bounds = np.linspace(0, 6000, 13)
+    distances, times = [], []
+    for lap in range(4):
+        # Each lap is clearly fastest in its own sectors, sampled about every 0.27 s
+        pace = np.where(np.arange(12) % 4 == lap, 60.0, 55.0 + rng.uniform(0, 3, 12))
+        distance = np.sort(np.r_[0.0, rng.uniform(0, 6000, 1400), 6000.0])
+        distances.append(distance)
+        times.append(np.concatenate([[0.0], np.cumsum(np.diff(distance) / pace[np.minimum(distance[1:] // 500, 11).astype(int)])]))
+    # The last column (from the last bound to the end of the lap) is empty here
+    result = minisector_times(distances, times, bounds)[:, :12]
+    duration, _, _ = _grouped(distances, times, bounds)
+    old = duration.unstack()[list(range(1, 13))].to_numpy()
+    assert (result.argmin(axis=0) == np.arange(12) % 4).all()
+    assert (result.argmin(axis=0) == old.argmin(axis=0)).all()
+
+
+def test_crossing_times_clamp_to_the_lap():
+    d = np.array([10.0, 20.0, 30.0])
+    t = np.array([1.0, 2.0, 3.0])
+    assert crossing_times([d], [t], [0.0, 15.0, 40.0])[0] == pytest.approx([1.0, 1.5, 3.0])
+    with pytest.raises(ValueError):
+        crossing_times([d[:1]], [t[:1]], [0.0])
@@ -0,0 +1,44 @@
+import pytest
+from starlette.requests import Request
+
+from utils import profiling
+
+
+def _request(client="127.0.0.1", **headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/telemetry",
+        "query_string": b"profile=1",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+        "client": (client, 50000),
+    })
+
+
+@pytest.fixture
+def token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    return "secret"
+
+
+def test_off_without_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    assert not profiling.client_allowed(_request(x_profile_token=""))
+
+
+def test_allowed_with_token(token):
+    assert profiling.client_allowed(_request(x_profile_token=token))
+
+
+@pytest.mark.parametrize("headers", [{}, {"x_profile_token": "wrong"}])
+def test_refused_without_the_token(token, headers):
+    assert not profiling.client_allowed(_request(**headers))
+
+
+def test_refused_from_other_clients(token):
+    assert not profiling.client_allowed(_request(client="203.0.113.7", x_profile_token=token))
+
+
+@pytest.mark.parametrize("header", ["x_forwarded_for", "forwarded", "x_real_ip"])
+def test_refused_through_a_proxy(token, header):
+    assert not profiling.client_allowed(_request(x_profile_token=token, **{header: "203.0.113.7"}))
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main
+from utils import response_cache, telemetry
+
+PARAMS = {"session_year": "2023", "session_name": "Bahrain Grand Prix", "identifier": "R", "drivers": ["VER", "PER"]}
+
+
+def test_partial_response_is_not_cached(synthetic_api, monkeypatch):
+    merge = telemetry._merge_lap_telemetry
+    failed = []
+
+    def flaky(key, lap):
+        if not failed:
+            failed.append(lap["Driver"])
+            raise OSError("transient")
+        return merge(key, lap)
+
+    monkeypatch.setattr(telemetry, "_merge_lap_telemetry", flaky)
+    client = TestClient(main.app)
+
+    partial = client.get("/api/v1/telemetry", params=PARAMS)
+    assert partial.status_code == 200
+    assert len(partial.json()) == 1
+    assert "ETag" not in partial.headers
+    assert len(response_cache.response_cache) == 0
+
+    full = client.get("/api/v1/telemetry", params=PARAMS)
+    assert sorted(full.json()) == ["2023_PER", "2023_VER"]
+    assert "ETag" in full.headers
+
+
+def test_final_session_is_cached_long(synthetic_api):
+    client = TestClient(main.app)
+    response = client.get("/api/v1/telemetry", params=PARAMS)
+    assert response.headers["Cache-Control"] == f"public, max-age={response_cache.RESPONSE_MAX_AGE}"
+    (key,) = list(response_cache.response_cache._entries)
+    assert response_cache.response_cache.peek(key)[2] == 0
+
+
+def test_live_session_expires(synthetic_api, monkeypatch):
+    monkeypatch.setattr(response_cache, "session_final", lambda key: False)
+    client = TestClient(main.app)
+    response = client.get("/api/v1/telemetry", params=PARAMS)
+    assert response.headers["Cache-Control"] == f"public, max-age={response_cache.RESPONSE_LIVE_MAX_AGE}"
+
+    # Served from the cache until it expires, then computed again
+    (key,) = list(response_cache.response_cache._entries)
+    etag, body, expires = response_cache.response_cache.peek(key)
+    assert expires > 0
+    assert response_cache._lookup(key) is not None
+    response_cache.response_cache.put(key, (etag, body, 1.0))
+    assert response_cache._lookup(key) is None
+
+
+def test_session_final(monkeypatch):
+    now = pd.Timestamp.utcnow().tz_localize(None)
+    dates = {2020: now - pd.Timedelta(days=400), 2026: now - pd.Timedelta(hours=2)}
+    monkeypatch.setattr(response_cache.ff1, "get_session", lambda year, name, identifier: SimpleNamespace(date=dates[year]))
+    monkeypatch.setattr(response_cache, "_final_sessions", {})
+
+    assert response_cache.session_final((2020, "Bahrain Grand Prix", "R"))
+    assert not response_cache.session_final((2026, "Bahrain Grand Prix", "R"))
+    # Unknown sessions are not final
+    assert not response_cache.session_final((2030, "Bahrain Grand Prix", "R"))
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_session
+from utils import channel_store, sessions, store
+
+KEY = (2023, "Bahrain Grand Prix", "R")
+
+
+def _raw(data, offsets):
+    # Per-driver frames as fastf1._api returns them: Time of the live stream, no SessionTime
+    raw = {}
+    for drv, tel in data.items():
+        frame = pd.DataFrame(tel).drop(columns=["SessionTime"])
+        frame["Time"] = frame["Date"] - offsets[drv]
+        raw[drv] = frame[["Time"] + [c for c in frame.columns if c != "Time"]]
+    return raw
+
+
+@pytest.fixture
+def source():
+    session = make_session(n_drivers=3, n_laps=3)
+    # Slightly different stream offsets per driver; t0 is the latest of them
+    offsets = {drv: session._t0_date - pd.Timedelta(milliseconds=10 * i) for i, drv in enumerate(session.drivers)}
+    return session, {"car": _raw(session._car_data, offsets), "pos": _raw(session._pos_data, offsets)}
+
+
+@pytest.fixture
+def loaders(source, monkeypatch, tmp_path):
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path))
+    raw = source[1]
+    monkeypatch.setattr(sessions, "_CHANNEL_LOADERS", {
+        channel: (lambda api_path, channel=channel: {drv: frame.copy() for drv, frame in raw[channel].items()})
+        for channel in raw
+    })
+
+
+def _bare_session():
+    session = make_session(n_drivers=3, n_laps=3)
+    del session._car_data, session._pos_data
+    session._t0_date = None
+    return session
+
+
+def test_load_channels_several_drivers(source, loaders):
+    expected, _ = source
+    session = _bare_session()
+    sessions._load_channels(KEY, session, ["car", "pos"])
+
+    assert session._t0_date == expected._t0_date
+    assert sessions.loaded_channels(session) == {"car", "pos"}
+    for drv in expected.drivers:
+        car = session.car_data[drv]
+        assert len(car) == len(expected.car_data[drv])
+        assert (car["Time"] == car["Date"] - expected._t0_date).all()
+        assert (car["SessionTime"] == expected.car_data[drv]["SessionTime"]).all()
+        assert (session.pos_data[drv]["X"] == expected.pos_data[drv]["X"]).all()
+
+
+def test_load_channels_upgrade(source, loaders):
+    expected, _ = source
+    session = _bare_session()
+    sessions._load_channels(KEY, session, ["car"])
+    sessions._load_channels(KEY, session, ["pos"])
+
+    assert session._t0_date == expected._t0_date
+    drv = expected.drivers[0]
+    assert (session.pos_data[drv]["Time"] == expected.pos_data[drv]["Time"]).all()
+
+
+def test_load_channels_maps_stored_channels(source, loaders, monkeypatch):
+    fetched = _bare_session()
+    sessions._load_channels(KEY, fetched, ["car", "pos"])
+    assert channel_store.read_channel_meta(KEY, "car") is not None
+
+    # A second worker maps the files instead of fetching
+    monkeypatch.setattr(sessions, "_CHANNEL_LOADERS", {})
+    mapped = _bare_session()
+    sessions._load_channels(KEY, mapped, ["car", "pos"])
+
+    assert set(mapped._mapped_channels) == {"car", "pos"}
+    assert mapped._t0_date == fetched._t0_date
+    for drv in fetched.drivers:
+        for attr in ("car_data", "pos_data"):
+            a, b = getattr(fetched, attr)[drv], getattr(mapped, attr)[drv]
+            pd.testing.assert_frame_equal(pd.DataFrame(a), pd.DataFrame(b)[a.columns])
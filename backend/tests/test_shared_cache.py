@@ -0,0 +1,31 @@
+import pytest
+
+from utils.shared_cache import CacheBackend, LocalBackend, SQLiteBackend
+
+
+def test_backends_implement_every_method():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class Partial(CacheBackend):
+        def get(self, key, count=True):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "local":
+        return LocalBackend(1 << 20)
+    return SQLiteBackend(str(tmp_path / "cache.sqlite"), 1 << 20)
+
+
+def test_get_or_fill(backend):
+    assert backend.get_or_fill("key", lambda: None) is None
+    assert backend.get("key") is None
+    assert backend.get_or_fill("key", lambda: b"value") == b"value"
+    assert backend.get_or_fill("key", lambda: b"other") == b"value"
+    backend.delete("key")
+    assert backend.get("key") is None
@@ -0,0 +1,51 @@
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils import telemetry
+
+PARAMS = {"session_year": "2023,2024", "session_name": "Bahrain Grand Prix", "identifier": "R",
+          "drivers": ["VER", "PER"], "stream": "true"}
+
+
+def test_one_line_per_driver_year(synthetic_api):
+    client = TestClient(main.app)
+    response = client.get("/api/v1/telemetry", params=PARAMS)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "ETag" not in response.headers
+
+    lines = response.content.rstrip(b"\n").split(b"\n")
+    items = [json.loads(line) for line in lines]
+    assert sorted(item["key"] for item in items) == ["2023_PER", "2023_VER", "2024_PER", "2024_VER"]
+
+    # Each item is what the non-streamed endpoint returns for that driver-year
+    whole = client.get("/api/v1/telemetry", params={**PARAMS, "stream": "false"}).json()
+    for item in items:
+        assert item["data"] == whole[item["key"]]
+
+
+def test_failed_item_is_an_error_line(synthetic_api, monkeypatch):
+    merge = telemetry._merge_lap_telemetry
+
+    def failing(key, lap):
+        if key[0] == 2024 and lap["Driver"] == "PER":
+            raise OSError("no telemetry")
+        return merge(key, lap)
+
+    monkeypatch.setattr(telemetry, "_merge_lap_telemetry", failing)
+    response = TestClient(main.app).get("/api/v1/telemetry", params=PARAMS)
+    items = {item["key"]: item for item in map(json.loads, response.content.rstrip(b"\n").split(b"\n"))}
+    assert len(items) == 4
+    assert items["2024_PER"] == {"key": "2024_PER", "error": "no telemetry"}
+    assert all("data" in item for key, item in items.items() if key != "2024_PER")
+
+
+def test_msgpack_items(synthetic_api):
+    msgpack = pytest.importorskip("msgpack")
+    response = TestClient(main.app).get("/api/v1/telemetry", params={**PARAMS, "format": "msgpack"})
+    items = list(msgpack.Unpacker(io.BytesIO(response.content), raw=False))
+    assert sorted(item["key"] for item in items) == ["2023_PER", "2023_VER", "2024_PER", "2024_VER"]
@@ -0,0 +1,19 @@
+from fastapi.testclient import TestClient
+
+import main
+from utils import sessions
+
+PARAMS = {"session_name": "Bahrain Grand Prix", "identifier": "R", "drivers": ["VER", "PER"]}
+
+
+def test_telemetry_after_a_session_cached_without_positions(synthetic_api):
+    client = TestClient(main.app)
+    braking = client.get("/api/v1/braking-distribution", params={**PARAMS, "session_year": "2023"})
+    assert braking.status_code == 200
+    (key,) = list(sessions.session_cache._entries)
+    assert "pos" not in sessions.loaded_channels(sessions.session_cache.peek(key))
+
+    telemetry = client.get("/api/v1/telemetry", params={**PARAMS, "session_year": "2023"})
+    assert telemetry.status_code == 200
+    assert sorted(telemetry.json()) == ["2023_PER", "2023_VER"]
+    assert all(len(rows) > 0 for rows in telemetry.json().values())
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils import circuits, telemetry, warmup
+from utils.shared_cache import LocalBackend
+
+KEY = (2023, "Bahrain Grand Prix", "R")
+
+
+@pytest.fixture
+def fresh_warmup(monkeypatch):
+    status = dict(warmup._status, state="pending", total=0, warmed=[], failed=[], current=None, started=None, finished=None)
+    monkeypatch.setattr(warmup, "_status", status)
+    monkeypatch.setattr(warmup, "WARM_SESSIONS", "2023/Bahrain Grand Prix/R;2024/Bahrain Grand Prix/R")
+    monkeypatch.setattr(warmup, "WARM_LAST_EVENTS", 0)
+
+
+def _wait_ready(client, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/ready")
+        if response.status_code == 200:
+            return response
+        time.sleep(0.01)
+    raise AssertionError(f"not ready after {timeout}s: {response.json()}")
+
+
+def test_ready_after_warmup(fresh_warmup, monkeypatch):
+    release = threading.Event()
+    warmed = []
+
+    def warm(key):
+        release.wait(10)
+        if key[0] == 2024:
+            raise OSError("not available")
+        warmed.append(key)
+
+    monkeypatch.setattr(warmup, "warm_session", warm)
+    client = TestClient(main.app)
+    assert client.get("/ready").status_code == 503
+
+    warmup.start_warmup()
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["state"] in ("resolving", "warming")
+    assert response.json()["ready"] is False
+
+    release.set()
+    status = _wait_ready(client).json()
+    assert status["state"] == "done" and status["total"] == 2
+    # A session that fails still counts as tried
+    assert status["warmed"] == ["2023/Bahrain Grand Prix/R"]
+    assert status["failed"] == ["2024/Bahrain Grand Prix/R"]
+    assert warmed == [KEY]
+
+
+def test_ready_without_sessions_to_warm(fresh_warmup, monkeypatch):
+    monkeypatch.setattr(warmup, "WARM_SESSIONS", "")
+    warmup.start_warmup()
+    assert TestClient(main.app).get("/ready").status_code == 200
+
+
+def test_warm_session_fills_the_caches(synthetic_api, monkeypatch, tmp_path):
+    monkeypatch.setattr(circuits, "CIRCUIT_INDEX_PATH", str(tmp_path / "circuits.json"))
+    monkeypatch.setattr(circuits, "_index", {})
+    monkeypatch.setattr(circuits, "shared_cache", LocalBackend(1 << 20))
+    warmup.warm_session(KEY)
+
+    index = telemetry.get_lap_index(*KEY)
+    for driver in index.drivers:
+        lap = index.fastest(driver)
+        assert (*KEY, lap["Driver"], int(lap["LapNumber"])) in telemetry.telemetry_cache
+    assert "2023/Bahrain Grand Prix" in circuits._index
@@ -0,0 +1,176 @@
+"""CPU-bound parts of the analytics endpoints, run on the compute executor (see utils/compute.py).
+
+Each function takes a dict of numpy arrays (ragged per-lap data packed with
+`compute.pack_ragged`) and returns compact results. They must not import the
+FastF1 or FastAPI layers, so worker processes stay light.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from utils.braking import braking_distances
+from utils.compute import unpack_ragged
+from utils.downsample import lttb_indices
+from utils.minisectors import minisector_times
+
+
+def dominance_stats(arrays, bounds):
+    """Fastest lap index per minisector and its gain over the average of the other laps, in seconds."""
+    sector_times = minisector_times(
+        unpack_ragged(arrays["distance"], arrays["offsets"]),
+        unpack_ragged(arrays["time"], arrays["offsets"]),
+        bounds,
+    )
+
+    # Fastest lap per sector, and the average time of everyone else
+    fastest_idx = sector_times.argmin(axis=0)
+    fastest_time = sector_times.min(axis=0)
+    n_laps = sector_times.shape[0]
+    mean_others = (sector_times.sum(axis=0) - fastest_time) / (n_laps - 1) if n_laps > 1 else np.zeros_like(fastest_time)
+    return fastest_idx, mean_others - fastest_time
+
+
+# Spatial indexes of recent reference laps, per process: {reference_key: cKDTree}
+REFERENCE_TREES = 32
+_reference_trees = OrderedDict()
+_reference_trees_lock = threading.Lock()
+
+# Nearest reference samples considered per point, and how far a match may be
+# from the point's expected position along the reference lap: this share of
+# the reference lap length, and no less than the span of the candidates
+MATCH_CANDIDATES = 4
+MATCH_TOLERANCE_SHARE = 0.05
+
+
+def match_tolerance(ref_distance):
+    """How far (in meters) a match may be from its expected position on a reference lap with samples at `ref_distance`."""
+    spacing = np.median(np.diff(ref_distance)) if len(ref_distance) > 1 else 0.0
+    return max(MATCH_TOLERANCE_SHARE * (ref_distance[-1] - ref_distance[0]), MATCH_CANDIDATES * spacing)
+
+
+def _reference_tree(ref_xy, reference_key):
+    with _reference_trees_lock:
+        tree = _reference_trees.get(reference_key) if reference_key is not None else None
+        if tree is not None:
+            _reference_trees.move_to_end(reference_key)
+            return tree
+    tree = cKDTree(ref_xy)
+    if reference_key is not None:
+        with _reference_trees_lock:
+            _reference_trees[reference_key] = tree
+            while len(_reference_trees) > REFERENCE_TREES:
+                _reference_trees.popitem(last=False)
+    return tree
+
+
+def _project(points, ref_xy, ref_distance, idx):
+    """Distance along the reference lap of each point projected onto the segment after (or before) sample `idx`."""
+    last = len(ref_distance) - 1
+    start = np.where(idx == last, idx - 1, idx)
+    seg = ref_xy[start + 1] - ref_xy[start]
+    length2 = np.einsum("ij,ij->i", seg, seg)
+    t = np.einsum("ij,ij->i", points - ref_xy[start], seg) / np.where(length2 > 0, length2, 1.0)
+
+    # Points before the start of the segment belong to the previous one
+    before = (t < 0) & (start > 0)
+    start = np.where(before, start - 1, start)
+    seg = ref_xy[start + 1] - ref_xy[start]
+    length2 = np.einsum("ij,ij->i", seg, seg)
+    t = np.einsum("ij,ij->i", points - ref_xy[start], seg) / np.where(length2 > 0, length2, 1.0)
+
+    t = np.clip(t, 0.0, 1.0)
+    return ref_distance[start] + t * (ref_distance[start + 1] - ref_distance[start])
+
+
+def lap_gaps(arrays, target_points, smoothing_window, reference_key=None):
+    """Gap to the reference lap along its distance, as `(distance, gap)` arrays per compared lap.
+
+    Every sample of every compared lap is matched onto the reference lap in
+    one batched query of its spatial index (cached per `reference_key`). Of
+    the nearest reference samples, the one closest to where the lap's own
+    distance says it should be is taken and the point is projected onto the
+    reference path there; matches stay monotone along the lap. The smoothed
+    gaps are reduced to `target_points` points per lap with LTTB.
+    """
+    ref_xy = np.column_stack((arrays["ref_x"], arrays["ref_y"]))
+    valid = np.isfinite(ref_xy).all(axis=1) & np.isfinite(arrays["ref_distance"]) & np.isfinite(arrays["ref_time"])
+    ref_xy = ref_xy[valid]
+    ref_distance = arrays["ref_distance"][valid]
+    ref_time = arrays["ref_time"][valid]
+    if len(ref_distance) < 2:
+        return [(np.empty(0), np.empty(0)) for _ in range(len(arrays["offsets"]) - 1)]
+    tree = _reference_tree(ref_xy, reference_key)
+
+    offsets = arrays["offsets"]
+    lengths = np.diff(offsets)
+    lap_of = np.repeat(np.arange(len(lengths)), lengths)
+    distance = arrays["distance"]
+    points = np.column_stack((arrays["x"], arrays["y"]))
+
+    # Expected position on the reference lap, from each lap's distance scaled to the reference length
+    lap_end = np.zeros(len(lengths))
+    nonempty = lengths > 0
+    lap_end[nonempty] = distance[offsets[1:][nonempty] - 1]
+    scale = np.divide(ref_distance[-1], lap_end, out=np.ones_like(lap_end), where=lap_end > 0)
+    expected = np.clip(distance * scale[lap_of], ref_distance[0], ref_distance[-1])
+
+    # Nearest reference samples of all points at once; pick the candidate in line with the lap's progress
+    matched = expected.copy()
+    located = np.isfinite(points).all(axis=1) & np.isfinite(expected)
+    if located.any():
+        k = min(MATCH_CANDIDATES, len(ref_distance))
+        _, candidates = tree.query(points[located], k=k)
+        candidates = candidates.reshape(-1, k)
+        offset = np.abs(ref_distance[candidates] - expected[located, None])
+        chosen = candidates[np.arange(len(candidates)), offset.argmin(axis=1)]
+        matched[located] = _project(points[located], ref_xy, ref_distance, chosen)
+
+    # No nearby sample fits (e.g. the track crosses itself): fall back to the expected position
+    matched = np.where(np.abs(matched - expected) > match_tolerance(ref_distance), expected, matched)
+
+    # Monotone along each lap: a running maximum (skipping NaN), with laps shifted apart so they do not interact
+    span = ref_distance[-1] - ref_distance[0] + 1.0
+    matched = np.fmax.accumulate(matched + lap_of * span) - lap_of * span
+
+    gap = arrays["time"] - np.interp(matched, ref_distance, ref_time)
+
+    gaps = []
+    for lap_x, lap_gap in zip(unpack_ragged(matched, offsets), unpack_ragged(gap, offsets)):
+        smooth = pd.Series(lap_gap).rolling(
+            window=smoothing_window,
+            center=True,
+            min_periods=1
+        ).mean().to_numpy()
+
+        keep = np.isfinite(lap_x) & np.isfinite(smooth)
+        lap_x, smooth = lap_x[keep], smooth[keep]
+
+        # Trim edges to remove artifacts
+        # Remove 10 points from start/end (approx covers the smoothing window radius)
+        if len(lap_x) > 20:
+            lap_x, smooth = lap_x[10:-10], smooth[10:-10]
+
+        keep = lttb_indices(lap_x, smooth, target_points)
+        lap_x, smooth = lap_x[keep], smooth[keep]
+
+        gaps.append((lap_x, smooth))
+    return gaps
+
+
+def braking_distribution(arrays):
+    """`braking.braking_distances` for several drivers at once; car data and laps are packed per driver."""
+    samples = arrays["sample_offsets"]
+    laps = arrays["lap_offsets"]
+    return [
+        braking_distances(session_ns, speed, brake, start_ns, end_ns)
+        for session_ns, speed, brake, start_ns, end_ns in zip(
+            unpack_ragged(arrays["session_ns"], samples),
+            unpack_ragged(arrays["speed"], samples),
+            unpack_ragged(arrays["brake"], samples),
+            unpack_ragged(arrays["start_ns"], laps),
+            unpack_ragged(arrays["end_ns"], laps),
+        )
+    ]
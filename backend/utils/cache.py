@@ -0,0 +1,164 @@
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+
+def deep_nbytes(obj):
+    """Approximate resident size of `obj` in bytes (DataFrames, arrays and containers of them)."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True, index=True)
+        return int(usage.sum()) if isinstance(obj, pd.DataFrame) else int(usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deep_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(deep_nbytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class ByteBudgetCache:
+    """Thread-safe LRU cache that evicts by total size in bytes instead of entry count.
+
+    `sizeof` is called once per inserted value. Pinned keys are never evicted,
+    but still count towards the budget. `get_or_load` coalesces concurrent
+    misses for the same key into a single call of the loader.
+    """
+
+    def __init__(self, max_bytes, sizeof=deep_nbytes):
+        self.max_bytes = int(max_bytes)
+        self._sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._pinned = set()
+        self._inflight = {}  # key -> Future of a load in progress
+        self._lock = threading.RLock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key):
+        """Return the cached value without counting a hit/miss or touching the LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[0]
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for `key`, calling `loader()` on a miss.
+
+        Threads that miss while another thread is already loading the same key
+        wait for that result instead of loading again. If the loader (or
+        sizing the value) raises, every waiter gets the exception and nothing
+        is cached, so the next call retries.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        error = None
+        try:
+            value = loader()
+            self.put(key, value)
+            return value
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            # Also when sizing or storing the value fails: the key must never stay in flight
+            with self._lock:
+                del self._inflight[key]
+            if error is None:
+                future.set_result(value)
+            else:
+                future.set_exception(error)
+
+    def put(self, key, value):
+        nbytes = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.total_bytes += nbytes
+            self._evict()
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self.total_bytes -= entry[1]
+            return entry[0]
+
+    def pin(self, key):
+        with self._lock:
+            self._pinned.add(key)
+
+    def unpin(self, key):
+        with self._lock:
+            self._pinned.discard(key)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def _evict(self):
+        # Walk from least to most recently used, skipping pinned keys
+        for key in list(self._entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if key in self._pinned:
+                continue
+            self.total_bytes -= self._entries.pop(key)[1]
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "loading": len(self._inflight),
+                "pinned": [list(k) if isinstance(k, tuple) else k for k in self._pinned],
+            }
@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from utils import store
+
+# Car and position telemetry of whole sessions, as one .npy file per column
+# under <TELEMETRY_STORE_DIR>/<year>/<event>/<session>/channels/<channel>/.
+# The files are memory-mapped read-only, so every worker process on a host
+# shares one copy of the samples in the OS page cache instead of holding its own.
+CHANNEL_STORE_ENABLED = (
+    os.environ.get("TELEMETRY_STORE", "1") != "0" and os.environ.get("TELEMETRY_MMAP", "1") != "0"
+)
+
+# Bump when the layout or contents of the channel files change; older files are ignored
+CHANNEL_STORE_VERSION = 1
+
+# Column kinds that can be mapped as they are: numbers, bools, datetimes and timedeltas
+_MAPPABLE_KINDS = "biufmM"
+
+
+def _channel_dir(key, channel):
+    return os.path.join(store.session_dir(key), "channels", channel)
+
+
+def _column_path(directory, name):
+    return os.path.join(directory, f"{name}.npy")
+
+
+def write_channel(key, channel, data, offset, t0_date):
+    """Write the telemetry of one channel (`{driver: Telemetry}`) of a session, unless it is stored already.
+
+    `offset` is the channel's own time offset (rounded `Date - Time` of the
+    raw data) and `t0_date` the session start the `Time` column is relative
+    to. Columns are concatenated over drivers; categorical columns are stored
+    as their codes. Channels with columns that cannot be mapped (e.g. text
+    not converted to categories) are not stored.
+    """
+    directory = _channel_dir(key, channel)
+    if not CHANNEL_STORE_ENABLED or not data or os.path.isdir(directory):
+        return
+
+    drivers = list(data)
+    frames = [data[drv] for drv in drivers]
+    columns = {}
+    for name in frames[0].columns:
+        # Both time columns hold the same values; only Time is stored
+        if name == "SessionTime":
+            continue
+        dtype = frames[0][name].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            columns[name] = {"categories": list(dtype.categories)}
+        elif dtype.kind in _MAPPABLE_KINDS:
+            columns[name] = {}
+        else:
+            print(f"Not storing {channel} data of {key}: column {name} has dtype {dtype}")
+            return
+        if any(list(frame.columns) != list(frames[0].columns) or frame[name].dtype != dtype for frame in frames):
+            print(f"Not storing {channel} data of {key}: drivers have different columns")
+            return
+
+    lengths = [len(frame) for frame in frames]
+    meta = {
+        "version": CHANNEL_STORE_VERSION,
+        "drivers": drivers,
+        "offsets": np.concatenate([[0], np.cumsum(lengths)]).tolist(),
+        "columns": columns,
+        "offset": offset.isoformat(),
+        "t0_date": t0_date.isoformat(),
+    }
+
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    # Written into a temporary directory and renamed, so readers never see a partial channel
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=f".{channel}-")
+    try:
+        for name, info in columns.items():
+            if "categories" in info:
+                values = np.concatenate([frame[name].cat.codes.to_numpy() for frame in frames])
+            else:
+                values = np.concatenate([frame[name].to_numpy() for frame in frames])
+            np.save(_column_path(tmp_dir, name), values)
+        # The meta file goes last: a channel without one is never read
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        os.rename(tmp_dir, directory)
+    except OSError as e:
+        # Also the case when another worker stored the same channel first
+        if not os.path.isdir(directory):
+            print(f"Error writing {channel} data of {key}: {e}")
+    finally:
+        if os.path.isdir(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def read_channel_meta(key, channel):
+    """Meta data of a stored channel, or None if it is not stored (or stored by another version)."""
+    if not CHANNEL_STORE_ENABLED:
+        return None
+    path = os.path.join(_channel_dir(key, channel), "meta.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading {path}: {e}")
+        return None
+    if meta.get("version") != CHANNEL_STORE_VERSION:
+        return None
+    meta["offset"] = pd.Timestamp(meta["offset"])
+    meta["t0_date"] = pd.Timestamp(meta["t0_date"])
+    return meta
+
+
+def read_channel(key, channel, meta, t0_date):
+    """Map a stored channel and return `({driver: DataFrame}, copied_bytes)`.
+
+    The frames are read-only views on the mapped files. Only when `t0_date`
+    differs from the session start the channel was stored with are the time
+    columns recomputed, into private memory; `copied_bytes` is their size.
+    """
+    directory = _channel_dir(key, channel)
+    arrays = {}
+    for name, info in meta["columns"].items():
+        values = np.load(_column_path(directory, name), mmap_mode="r")
+        if "categories" in info:
+            values = pd.Categorical.from_codes(values, dtype=pd.CategoricalDtype(info["categories"]))
+        arrays[name] = values
+
+    copied = 0
+    if t0_date != meta["t0_date"] and "Time" in arrays:
+        arrays["Time"] = (arrays["Date"] - t0_date.to_datetime64()).astype("timedelta64[ns]")
+        copied = arrays["Time"].nbytes
+    if "Time" in arrays:
+        arrays["SessionTime"] = arrays["Time"]
+
+    offsets = meta["offsets"]
+    frames = {}
+    for i, drv in enumerate(meta["drivers"]):
+        start, end = offsets[i], offsets[i + 1]
+        frames[drv] = pd.DataFrame({name: values[start:end] for name, values in arrays.items()}, copy=False)
+    return frames, copied
+
+
+def remove_channels(key):
+    """Delete the stored channels of a session; workers that mapped them keep reading the old files."""
+    directory = os.path.join(store.session_dir(key), "channels")
+    if os.path.isdir(directory):
+        shutil.rmtree(directory, ignore_errors=True)
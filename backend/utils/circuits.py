@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from utils import store
+from utils.sectors import label_dict, sector_dict
+from utils.sessions import get_loaded_session
+from utils.shared_cache import shared_cache
+from utils.telemetry import get_lap_index, get_lap_telemetry
+
+# Circuit metadata built so far, one entry per (event, layout year); read once at startup
+CIRCUIT_INDEX_PATH = os.environ.get("CIRCUIT_INDEX_PATH", os.path.join(store.STORE_DIR, "circuits.json"))
+
+# Minisectors for circuits that are not in sectors.sector_dict
+DEFAULT_MINISECTORS = 12
+
+
+def _index_key(year, name):
+    return f"{int(year)}/{name}"
+
+
+def _read_index():
+    if not os.path.exists(CIRCUIT_INDEX_PATH):
+        return {}
+    try:
+        with open(CIRCUIT_INDEX_PATH) as f:
+            index = json.load(f)
+    except Exception as e:
+        print(f"Error reading {CIRCUIT_INDEX_PATH}: {e}")
+        return {}
+    for meta in index.values():
+        _restore_labels(meta)
+    return index
+
+
+def _restore_labels(meta):
+    # JSON object keys are strings; minisectors are numbered from 1
+    meta["labels"] = {int(k): v for k, v in meta["labels"].items()}
+    return meta
+
+
+_index = _read_index()
+_index_lock = threading.Lock()
+
+
+def _write_index():
+    directory = os.path.dirname(CIRCUIT_INDEX_PATH) or "."
+    os.makedirs(directory, exist_ok=True)
+    with _index_lock:
+        content = json.dumps(_index, indent=1)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, CIRCUIT_INDEX_PATH)
+    except Exception as e:
+        print(f"Error writing {CIRCUIT_INDEX_PATH}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def speed_class(speed):
+    if speed < 100:
+        return 'Slow'
+    elif speed < 200:
+        return 'Medium'
+    elif speed < 260:
+        return 'Fast'
+    return 'Straight'
+
+
+def _build_circuit(year, name, identifier):
+    reference_lap = get_lap_index(year, name, identifier).fastest()
+    reference = get_lap_telemetry(year, name, identifier, reference_lap)
+
+    if name in sector_dict:
+        bounds = sector_dict[name]
+    else:
+        bounds = np.linspace(0, reference['Distance'].max(), DEFAULT_MINISECTORS + 1)
+    bounds = [float(round(b, 0)) for b in bounds]
+
+    if name in label_dict:
+        labels = dict(label_dict[name])
+    else:
+        # Label each minisector by the minimum speed of the reference lap in it
+        minisector = np.digitize(reference['Distance'], bins=bounds, right=False)
+        sector_speeds = reference['Speed'].groupby(minisector).min()
+        labels = {
+            int(m): speed_class(speed)
+            for m, speed in sector_speeds.items()
+            if 1 <= m < len(bounds)
+        }
+
+    # Corner distances come from the circuit info, which needs the full session
+    corners = None
+    try:
+        circuit_info = get_loaded_session(year, name, identifier).get_circuit_info()
+        if circuit_info is not None:
+            corners = [
+                {"distance": float(corner["Distance"]), "label": f"{corner['Number']}{corner['Letter']}"}
+                for _, corner in circuit_info.corners.iterrows()
+            ]
+    except Exception as e:
+        print(f"Error loading circuit info for {year} {name}: {e}")
+
+    return {"bounds": bounds, "labels": labels, "corners": corners}
+
+
+def get_circuit(year, name, identifier):
+    """Minisector bounds, minisector labels and corner distances of an event's layout in `year`.
+
+    Built once per (event, year) from the session's fastest lap and circuit
+    info, then kept in memory and in `CIRCUIT_INDEX_PATH`. Bounds and labels
+    come from `sectors.py` where a circuit has them. `corners` is None when
+    the circuit info could not be loaded; such entries are not persisted or
+    shared, so the next server start tries again.
+    """
+    index_key = _index_key(year, name)
+    meta = _index.get(index_key)
+    if meta is not None:
+        return meta
+
+    # Built once over all workers sharing the cache backend
+    built = {}
+
+    def build():
+        meta = built["meta"] = _build_circuit(year, name, identifier)
+        return json.dumps(meta).encode() if meta["corners"] is not None else None
+
+    value = shared_cache.get_or_fill(f"circuit/{index_key}", build)
+    meta = built["meta"] if "meta" in built else _restore_labels(json.loads(value))
+    with _index_lock:
+        _index[index_key] = meta
+    if meta["corners"] is not None and "meta" in built:
+        _write_index()
+    return meta
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+# Telemetry channels and the dtypes they are held in while cached:
+# continuous channels as float32, gear and DRS as int8, text channels as categories
+FLOAT32_CHANNELS = (
+    "Speed", "RPM", "Throttle", "X", "Y", "Z",
+    "Distance", "RelativeDistance", "DistanceToDriverAhead",
+)
+INT8_CHANNELS = ("nGear", "DRS")
+
+# Fixed categories, so that FastF1 can concatenate and fill the channels of
+# different sources (it adds "interpolation" rows when merging car and position data)
+CATEGORY_CHANNELS = {
+    "Source": pd.CategoricalDtype(["car", "pos", "interpolation"]),
+    "Status": pd.CategoricalDtype(["OnTrack", "OffTrack"]),
+}
+
+
+def _compact_column(series, name):
+    if series.dtype in (np.float32, np.int8):
+        return series
+    if name in FLOAT32_CHANNELS and series.dtype.kind in "iuf":
+        return series.astype(np.float32)
+    if name in INT8_CHANNELS and series.dtype.kind in "iuf":
+        values = series.to_numpy()
+        # Integral values in range only; otherwise (e.g. NaN for missing samples) float32 still halves it
+        if np.isfinite(values).all() and (values == np.round(values)).all() and np.abs(values).max(initial=0) < 128:
+            return series.astype(np.int8)
+        return series.astype(np.float32)
+    if name == "Brake" and series.dtype.kind in "iuf" and series.isin((0, 1)).all():
+        return series.astype(bool)
+    if name in CATEGORY_CHANNELS and series.dtype == object:
+        dtype = CATEGORY_CHANNELS[name]
+        # Unknown values would become NaN
+        if series.dropna().isin(dtype.categories).all():
+            return series.astype(dtype)
+    return series
+
+
+def compact_telemetry(frame):
+    """Convert the known telemetry channels of `frame` to compact dtypes, in place, and return it.
+
+    Works on plain DataFrames and FastF1 `Telemetry` alike; other columns and
+    channels already in their compact dtype are left as they are.
+    """
+    for name in frame.columns:
+        column = frame[name]
+        compact = _compact_column(column, name)
+        if compact is not column:
+            frame[name] = compact
+    return frame
+
+
+def compact_labels(values):
+    """Repeated string labels (driver, driver-year, minisector label) as a categorical."""
+    return pd.Categorical(values)
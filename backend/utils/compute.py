@@ -0,0 +1,110 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from utils.metrics import stage
+from utils.profiling import profiling_active
+
+# Worker processes for CPU-bound analytics; 0 runs them on the request threadpool instead
+COMPUTE_WORKERS = int(os.environ.get("COMPUTE_WORKERS", "2"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a server that runs threads can deadlock the child
+            _executor = ProcessPoolExecutor(
+                max_workers=COMPUTE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _discard_executor(executor):
+    # A worker died (e.g. killed for memory); the next call starts a fresh pool
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def pack_ragged(arrays, dtype=float):
+    """Concatenate a list of 1-D arrays into `(flat, offsets)`; array i is `flat[offsets[i]:offsets[i + 1]]`."""
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(a) for a in arrays])
+    flat = np.concatenate(arrays).astype(dtype, copy=False) if arrays else np.empty(0, dtype=dtype)
+    return flat, offsets
+
+
+def unpack_ragged(flat, offsets):
+    return [flat[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def _share(arrays):
+    # One block for all arrays, each starting on an 8 byte boundary
+    spec = []
+    size = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        spec.append((name, array.dtype.str, array.shape, size))
+        size += -(-array.nbytes // 8) * 8
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (name, dtype, shape, offset), array in zip(spec, arrays.values()):
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)[...] = array
+    return shm, spec
+
+
+def _run_shared(func, shm_name, spec, kwargs):
+    # Workers share the parent's resource tracker, which unlinks the block if the parent dies
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        arrays = {
+            name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            for name, dtype, shape, offset in spec
+        }
+        # Pickled here so that nothing returned still points into the block when it is closed
+        result = pickle.dumps(func(arrays, **kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+        del arrays
+        return result
+    finally:
+        shm.close()
+
+
+async def run_compute(func, arrays, **kwargs):
+    """Run `func(arrays, **kwargs)` on the compute executor and return its result.
+
+    `arrays` is a dict of numeric numpy arrays. They are copied once into a
+    shared memory block that the worker maps, instead of being pickled;
+    `func` must be a module-level function (see utils/analytics.py) and
+    should return compact results, which are pickled back.
+    """
+    with stage("compute"):
+        # Profiled requests compute in-process, where the profiler can see it
+        if COMPUTE_WORKERS <= 0 or profiling_active():
+            return await run_in_threadpool(func, arrays, **kwargs)
+
+        shm, spec = _share(arrays)
+        executor = _get_executor()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, _run_shared, func, shm.name, spec, kwargs)
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            raise
+        finally:
+            shm.close()
+            shm.unlink()
+        return pickle.loads(result)
@@ -0,0 +1,130 @@
+import heapq
+
+import numpy as np
+
+
+def lttb_indices(x, y, n):
+    """Indices of `n` points picked by Largest-Triangle-Three-Buckets from the series (x, y)."""
+    m = len(x)
+    if n >= m or n < 3:
+        return np.arange(m)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket boundaries for the m - 2 inner points; the end points are always kept
+    bounds = np.floor(np.arange(n - 1) * (m - 2) / (n - 2)).astype(int) + 1
+    bounds[-1] = m - 1
+
+    selected = np.empty(n, dtype=int)
+    selected[0], selected[-1] = 0, m - 1
+    a = 0
+    for i in range(n - 2):
+        start, end = bounds[i], bounds[i + 1]
+        # The third triangle corner is the average of the next bucket (or the last point)
+        next_end = bounds[i + 2] if i + 2 < len(bounds) else m
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def visvalingam_indices(x, y, n):
+    """Indices of the `n` points kept by Visvalingam-Whyatt simplification of the polyline (x, y)."""
+    m = len(x)
+    if n >= m or n < 3:
+        return np.arange(m)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    prev = np.arange(-1, m - 1)
+    nxt = np.arange(1, m + 1)
+
+    def triangle(i):
+        p, q = prev[i], nxt[i]
+        return abs((x[p] - x[i]) * (y[q] - y[i]) - (x[q] - x[i]) * (y[p] - y[i])) / 2
+
+    area = np.full(m, np.inf)
+    for i in range(1, m - 1):
+        area[i] = triangle(i)
+    heap = [(area[i], i) for i in range(1, m - 1)]
+    heapq.heapify(heap)
+
+    removed = np.zeros(m, dtype=bool)
+    remaining = m
+    while remaining > n:
+        a, i = heapq.heappop(heap)
+        if removed[i] or a != area[i]:
+            continue  # stale heap entry
+        removed[i] = True
+        remaining -= 1
+        p, q = prev[i], nxt[i]
+        nxt[p], prev[q] = q, p
+        for j in (p, q):
+            if 0 < j < m - 1:
+                # Never let a neighbour's area drop below the one just removed
+                area[j] = max(triangle(j), a)
+                heapq.heappush(heap, (area[j], j))
+    return np.flatnonzero(~removed)
+
+
+def change_indices(values):
+    """Indices of the last sample before every change in a discrete channel."""
+    values = np.asarray(values)
+    return np.flatnonzero(values[1:] != values[:-1])
+
+
+def _discrete_indices(frame, discrete, limit):
+    """Indices of the first and last rows and of the changes in the `discrete` channels, at most `limit` of them.
+
+    Both samples around every change are kept when they fit; otherwise only
+    the first sample after each change, and if even those do not fit, an
+    evenly spaced selection of them.
+    """
+    ends = np.array([0, len(frame) - 1])
+    changes = np.array([], dtype=int)
+    for col in discrete:
+        changes = np.union1d(changes, change_indices(frame[col].to_numpy()))
+
+    keep = np.union1d(ends, np.union1d(changes, changes + 1))
+    if len(keep) > limit:
+        keep = np.union1d(ends, changes + 1)
+    if len(keep) > limit:
+        keep = keep[np.unique(np.linspace(0, len(keep) - 1, max(limit, 2)).round().astype(int))]
+    return keep
+
+
+def downsample_series(frame, max_points, x, continuous, discrete=()):
+    """Reduce a telemetry frame to at most `max_points` rows.
+
+    Changes of the `discrete` channels take up to half of the budget (see
+    `_discrete_indices`); the rest is split between the `continuous`
+    channels, each reduced with LTTB against `x`.
+    """
+    if max_points is None or len(frame) <= max_points:
+        return frame
+
+    keep = _discrete_indices(frame, discrete, max_points // 2 if continuous else max_points)
+    if continuous:
+        per_channel = (max_points - len(keep)) // len(continuous)
+        if per_channel >= 3:
+            x_values = frame[x].to_numpy()
+            for col in continuous:
+                keep = np.union1d(keep, lttb_indices(x_values, frame[col].to_numpy(), per_channel))
+    return frame.iloc[keep]
+
+
+def simplify_path(frame, max_points, x, y, discrete=()):
+    """Reduce an X/Y track map to at most `max_points` rows; changes of the `discrete` channels take up to half of them."""
+    if max_points is None or len(frame) <= max_points:
+        return frame
+
+    keep = _discrete_indices(frame, discrete, max_points // 2)
+    budget = max_points - len(keep)
+    if budget >= 3:
+        keep = np.union1d(keep, visvalingam_indices(frame[x].to_numpy(), frame[y].to_numpy(), budget))
+    return frame.iloc[keep]
@@ -0,0 +1,135 @@
+import json
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException, Query, Request
+from fastapi.responses import Response
+
+from utils.metrics import stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# records: list of row objects, the shape the frontend reads (default)
+# columns: one JSON array per field
+# msgpack: the columnar shape, MessagePack encoded
+FORMATS = ("records", "columns", "msgpack")
+
+MEDIA_TYPES = {
+    "records": "application/json",
+    "columns": "application/json",
+    "msgpack": "application/x-msgpack",
+}
+
+
+def response_format(request: Request, format: str = Query(None)):
+    """Dependency resolving the response format from `?format=` or the Accept header."""
+    if format is None:
+        accept = request.headers.get("accept", "")
+        format = "msgpack" if "application/x-msgpack" in accept else "records"
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}', expected one of {FORMATS}")
+    if format == "msgpack" and msgpack is None:
+        raise HTTPException(status_code=406, detail="MessagePack encoding is not available on this server")
+    return format
+
+
+def _prepare(frame):
+    # Timedeltas are sent as seconds, like FastAPI's encoder does for the records format
+    frame = frame.reset_index(drop=True)
+    for col in frame.columns:
+        if pd.api.types.is_timedelta64_dtype(frame[col]):
+            frame[col] = frame[col].dt.total_seconds()
+    return frame
+
+
+def _column_tokens(series):
+    """JSON text of every value of a column; float32 values are written at float32 precision."""
+    if len(series) == 0:
+        return []
+    values = series.to_numpy()
+    if values.dtype == np.float32:
+        missing = np.isnan(values)
+        if missing.any():
+            values = np.where(missing, np.float32(0), values)
+        if orjson is not None:
+            tokens = orjson.dumps(values, option=orjson.OPT_SERIALIZE_NUMPY)[1:-1].split(b",")
+        else:
+            # numpy prints the shortest text that reads back as the same float32
+            tokens = [text.encode() for text in values.astype(str)]
+        for i in np.flatnonzero(missing):
+            tokens[i] = b"null"
+        return tokens
+    if values.dtype.kind in "biufmM":
+        # Numbers, bools and dates never contain a comma
+        return series.to_json(orient="values", date_format="iso", double_precision=15)[1:-1].encode().split(b",")
+    return [_dumps(v) for v in series.astype(object).where(series.notna(), None)]
+
+
+def _dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_json_default).encode()
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_json(payload, fmt):
+    # Built piecewise so frames are serialized by pandas / orjson instead of as Python dicts
+    if isinstance(payload, pd.DataFrame):
+        frame = _prepare(payload)
+        names = [_dumps(str(col)) for col in frame.columns]
+        tokens = [_column_tokens(frame[col]) for col in frame.columns]
+        if fmt == "records":
+            if not names:
+                return frame.to_json(orient="records").encode()
+            row = b"{" + b",".join(name.replace(b"%", b"%%") + b":%s" for name in names) + b"}"
+            return b"[" + b",".join([row % values for values in zip(*tokens)]) + b"]"
+        columns = (name + b":[" + b",".join(values) + b"]" for name, values in zip(names, tokens))
+        return b"{" + b",".join(columns) + b"}"
+    if isinstance(payload, dict):
+        items = (_dumps(str(k)) + b":" + _encode_json(v, fmt) for k, v in payload.items())
+        return b"{" + b",".join(items) + b"}"
+    if isinstance(payload, (list, tuple)):
+        return b"[" + b",".join(_encode_json(v, fmt) for v in payload) + b"]"
+    return _dumps(payload)
+
+
+def _to_msgpack_tree(payload):
+    if isinstance(payload, pd.DataFrame):
+        frame = _prepare(payload)
+        return {str(col): frame[col].astype(object).where(frame[col].notna(), None).tolist()
+                for col in frame.columns}
+    if isinstance(payload, dict):
+        return {str(k): _to_msgpack_tree(v) for k, v in payload.items()}
+    if isinstance(payload, (list, tuple)):
+        return [_to_msgpack_tree(v) for v in payload]
+    if isinstance(payload, np.generic):
+        return payload.item()
+    return payload
+
+
+def encode(payload, fmt="records"):
+    """Serialize an endpoint payload; DataFrames anywhere in it are encoded according to `fmt`."""
+    if fmt == "msgpack":
+        return msgpack.packb(_to_msgpack_tree(payload), use_bin_type=True)
+    return _encode_json(payload, fmt)
+
+
+def encoded_response(payload, fmt="records"):
+    with stage("encode"):
+        content = encode(payload, fmt)
+    return Response(content=content, media_type=MEDIA_TYPES[fmt])
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from fastf1 import exceptions
+from fastf1.core import Laps
+
+from utils.cache import deep_nbytes
+
+
+class LapIndex:
+    """Lookups on a session's laps table that the endpoints repeat on every request.
+
+    Built once when the laps enter a cache: the row positions of each
+    driver's laps, each driver's fastest lap, the fastest lap overall and the
+    fastest quick lap, and masks of the accurate, not deleted and
+    not-in-box laps. The selections match `Laps.pick_drivers(...)`,
+    `pick_fastest()`, `pick_quicklaps().pick_fastest()` and
+    `pick_accurate().pick_not_deleted().pick_wo_box()`.
+    """
+
+    def __init__(self, laps):
+        self.laps = laps
+        positions = np.arange(len(laps))
+
+        self._rows = {}
+        for column, normalize in (("Driver", str.upper), ("DriverNumber", str)):
+            if column not in laps.columns:
+                continue
+            codes = laps[column].to_numpy()
+            for code in pd.unique(codes):
+                if not pd.isna(code):
+                    self._rows[normalize(code)] = positions[codes == code]
+
+        # pick_fastest: the quickest personal best, first clocked on ties
+        lap_time = laps["LapTime"]
+        candidates = (laps["IsPersonalBest"] == True).to_numpy() & lap_time.notna().to_numpy()  # noqa: E712
+        # Kept as Lap rows: extracting a row costs more than the lookup
+        self._lap_rows = {}
+        self._fastest = {
+            code: self._first_fastest(rows[candidates[rows]]) for code, rows in self._rows.items()
+        }
+        self._fastest_overall = self._first_fastest(positions[candidates])
+
+        # pick_quicklaps: laps within 107% of the session's best lap time
+        quick = (lap_time < lap_time.min() * Laps.QUICKLAP_THRESHOLD).to_numpy()
+        self._fastest_quick = self._first_fastest(positions[candidates & quick])
+
+        self.accurate = laps["IsAccurate"].fillna(False).to_numpy(dtype=bool)
+        self.not_deleted = (
+            ~laps["Deleted"].fillna(False).to_numpy(dtype=bool) if "Deleted" in laps.columns else None
+        )
+        self.wo_box = (pd.isnull(laps["PitInTime"]) & pd.isnull(laps["PitOutTime"])).to_numpy()
+
+    def _first_fastest(self, rows):
+        if not len(rows):
+            return None
+        times = self.laps["LapTime"].to_numpy()[rows]
+        # argmin returns the first of equal minima, i.e. the first clocked
+        position = int(rows[np.argmin(times)])
+        if position not in self._lap_rows:
+            self._lap_rows[position] = self.laps.iloc[position]
+        return self._lap_rows[position]
+
+    def _driver_rows(self, driver):
+        driver = str(driver)
+        return self._rows.get(driver if driver.isdigit() else driver.upper(), np.empty(0, dtype=int))
+
+    @property
+    def drivers(self):
+        return list(pd.unique(self.laps["Driver"].dropna()))
+
+    def driver_laps(self, driver):
+        """`laps.pick_drivers(driver)`"""
+        return self.laps.iloc[self._driver_rows(driver)]
+
+    def fastest(self, driver=None):
+        """Fastest lap of `driver` (of the session if None) as `pick_fastest()` selects it, or None."""
+        if driver is None:
+            return self._fastest_overall
+        driver = str(driver)
+        return self._fastest.get(driver if driver.isdigit() else driver.upper())
+
+    def fastest_quick(self):
+        """`laps.pick_quicklaps().pick_fastest()`"""
+        return self._fastest_quick
+
+    def real_laps(self, driver=None):
+        """Accurate, not deleted laps without pit stops, of one driver or the whole session."""
+        if self.not_deleted is None:
+            raise exceptions.DataNotLoadedError(
+                "The Deleted column is only available when race control messages are loaded"
+            )
+        mask = self.accurate & self.not_deleted & self.wo_box
+        if driver is None:
+            return self.laps.iloc[np.flatnonzero(mask)]
+        rows = self._driver_rows(driver)
+        return self.laps.iloc[rows[mask[rows]]]
+
+    def lap(self, driver, lap_number):
+        """The lap `lap_number` of `driver`, or None."""
+        rows = self._driver_rows(driver)
+        match = rows[self.laps["LapNumber"].to_numpy()[rows] == lap_number]
+        return self.laps.iloc[int(match[0])] if len(match) else None
+
+    def nbytes(self):
+        masks = [self.accurate, self.wo_box] + ([self.not_deleted] if self.not_deleted is not None else [])
+        return deep_nbytes(self.laps) + sum(m.nbytes for m in masks) + sum(r.nbytes for r in self._rows.values())
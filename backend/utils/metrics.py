@@ -0,0 +1,214 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram buckets: seconds for durations, bytes for payload sizes (1 KB .. 256 MB)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(10))
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label combination."""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination, in the Prometheus layout."""
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _number(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+request_seconds = Histogram(
+    "davi_request_duration_seconds", "Time to produce a response, by endpoint and status.",
+    labels=("endpoint", "status"),
+)
+stage_seconds = Histogram(
+    "davi_stage_duration_seconds", "Time spent in a named stage of a request.",
+    labels=("endpoint", "stage"),
+)
+session_load_seconds = Histogram(
+    "davi_session_load_duration_seconds", "Time to load a FastF1 session or upgrade its profile.",
+    labels=("profile",),
+)
+response_bytes = Histogram(
+    "davi_response_bytes", "Size of response bodies with a known length.",
+    labels=("endpoint",), buckets=BYTES_BUCKETS,
+)
+response_cache_requests = Counter(
+    "davi_response_cache_requests_total", "Response cache lookups, by endpoint and result (hit/miss).",
+    labels=("endpoint", "result"),
+)
+
+# Timings of the current request: {"endpoint": label, "stages": {name: [seconds, count]}}
+_timing = contextvars.ContextVar("request_timing", default=None)
+_timing_lock = threading.Lock()
+
+
+def current_endpoint():
+    """Endpoint label of the current request, "background" outside of one."""
+    timing = _timing.get()
+    return "background" if timing is None else timing["endpoint"]
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as stage `name` of the current request.
+
+    Every run is observed in `stage_seconds`; inside a request it is also added
+    to the request's Server-Timing header, summed when a stage runs several times.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timing = _timing.get()
+        endpoint = "background" if timing is None else timing["endpoint"]
+        stage_seconds.observe(elapsed, endpoint=endpoint, stage=name)
+        if timing is not None:
+            with _timing_lock:
+                entry = timing["stages"].setdefault(name, [0.0, 0])
+                entry[0] += elapsed
+                entry[1] += 1
+
+
+def server_timing(stages, total):
+    """`Server-Timing` header value: one metric per stage plus the total, in milliseconds."""
+    parts = [
+        f'{name};dur={seconds * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+        for name, (seconds, count) in stages.items()
+    ]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _endpoint_label(request):
+    # Route paths only, so that arbitrary URLs cannot grow the number of series
+    app = request.app
+    paths = getattr(app.state, "metric_paths", None)
+    if paths is None:
+        paths = app.state.metric_paths = {getattr(route, "path", None) for route in app.routes}
+    return request.url.path if request.url.path in paths else "other"
+
+
+def instrument_requests():
+    """HTTP middleware timing every request and its stages.
+
+    Observes `request_seconds` and `response_bytes` and sets a `Server-Timing`
+    header with the stages recorded by `stage()` while the response was
+    produced. Streamed bodies are timed up to their first byte.
+    """
+
+    async def middleware(request, call_next):
+        endpoint = _endpoint_label(request)
+        timing = {"endpoint": endpoint, "stages": {}}
+        token = _timing.set(timing)
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _timing.reset(token)
+        total = time.perf_counter() - start
+
+        request_seconds.observe(total, endpoint=endpoint, status=response.status_code)
+        length = response.headers.get("content-length")
+        if length is not None:
+            response_bytes.observe(int(length), endpoint=endpoint)
+        with _timing_lock:
+            response.headers["Server-Timing"] = server_timing(timing["stages"], total)
+        # Lets browsers on other origins (the frontend) read the header
+        response.headers["Timing-Allow-Origin"] = "*"
+        return response
+
+    return middleware
+
+
+def render(caches=None):
+    """Every metric in the Prometheus text format, with `caches` ({name: stats dict}) as gauges and counters."""
+    lines = []
+    for metric in (request_seconds, stage_seconds, session_load_seconds, response_bytes, response_cache_requests):
+        lines.extend(metric.render())
+
+    if caches:
+        for field, kind, help in (
+            ("hits", "counter", "Cache hits."),
+            ("misses", "counter", "Cache misses."),
+            ("evictions", "counter", "Entries evicted over the byte budget."),
+            ("coalesced", "counter", "Misses that waited for a load already in progress."),
+            ("entries", "gauge", "Cached entries."),
+            ("bytes", "gauge", "Approximate size of the cached entries."),
+            ("max_bytes", "gauge", "Byte budget of the cache."),
+        ):
+            name = f"davi_cache_{field}" + ("_total" if kind == "counter" else "")
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            lines += [f'{name}{{cache="{cache}"}} {stats[field]}' for cache, stats in caches.items()]
+
+        lines += ["# HELP davi_cache_hit_ratio Hits over lookups since start.", "# TYPE davi_cache_hit_ratio gauge"]
+        for cache, stats in caches.items():
+            lookups = stats["hits"] + stats["misses"]
+            ratio = stats["hits"] / lookups if lookups else 0.0
+            lines.append(f'davi_cache_hit_ratio{{cache="{cache}"}} {_number(ratio)}')
+    return "\n".join(lines) + "\n"
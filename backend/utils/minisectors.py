@@ -0,0 +1,52 @@
+import numpy as np
+
+
+def crossing_times(distances, times, bounds):
+    """Time at which each lap crosses each minisector bound, as a (laps, bounds) array.
+
+    `distances` and `times` hold one array per lap (distance in meters,
+    non-decreasing, and time in seconds). Crossing times are linearly
+    interpolated between the samples on either side of a bound, like
+    `np.interp`: a bound before a lap's first sample or after its last one
+    gets the time of that sample. All laps are handled in one `searchsorted`
+    by laying them end to end on a shared distance axis.
+    """
+    bounds = np.asarray(bounds, dtype=float)
+    lengths = np.array([len(d) for d in distances])
+    if len(lengths) == 0:
+        return np.empty((0, len(bounds)))
+    if lengths.min() < 2:
+        raise ValueError("every lap needs at least two samples")
+
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    ends = starts + lengths - 1
+
+    # Shift lap i by i * span so all laps form one increasing distance axis
+    span = max(max(np.max(d) for d in distances), bounds.max(initial=0)) + 1
+    offsets = np.arange(len(lengths)) * span
+    flat_d = np.concatenate([np.asarray(d, dtype=float) + o for d, o in zip(distances, offsets)])
+    flat_t = np.concatenate([np.asarray(t, dtype=float) for t in times])
+
+    query = bounds[None, :] + offsets[:, None]
+    idx = np.searchsorted(flat_d, query.ravel()).reshape(query.shape)
+    # Interpolate between samples idx - 1 and idx, both inside the same lap
+    idx = np.clip(idx, (starts + 1)[:, None], ends[:, None])
+
+    d0, d1 = flat_d[idx - 1], flat_d[idx]
+    t0, t1 = flat_t[idx - 1], flat_t[idx]
+    step = d1 - d0
+    frac = np.divide(query - d0, step, out=np.zeros_like(step), where=step > 0)
+    return t0 + np.clip(frac, 0, 1) * (t1 - t0)
+
+
+def minisector_times(distances, times, bounds):
+    """Seconds each lap spends in each minisector, as a (laps, len(bounds)) array.
+
+    Column `i` is minisector `i + 1` in `np.digitize(distance, bounds)`
+    numbering; the last column runs from the last bound to the end of the lap.
+    Sector times use interpolated crossing times, so they add up to the lap
+    time instead of losing the gaps between samples of adjacent sectors.
+    """
+    crossings = crossing_times(distances, times, bounds)
+    lap_end = np.array([t[-1] for t in times], dtype=float).reshape(-1, 1)
+    return np.diff(np.hstack([crossings, lap_end]), axis=1)
@@ -0,0 +1,204 @@
+import collections
+import contextvars
+import ipaddress
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+# Profiles of single requests, as collapsed stacks plus a JSON summary per profile id
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "Profiles")
+
+# Profiling is off unless a token is configured; requests carry it in the X-Profile-Token header
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+
+# Clients allowed to request a profile, as IP addresses or networks separated by ','
+PROFILE_ALLOWED_CLIENTS = os.environ.get("PROFILE_ALLOWED_CLIENTS", "127.0.0.1,::1")
+
+# Headers set by proxies: behind one, every client seems to connect from the proxy's address
+_PROXY_HEADERS = ("x-forwarded-for", "forwarded", "x-real-ip")
+
+# Milliseconds between stack samples, and how many profiles are kept on disk
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "100"))
+
+_allowed_networks = [
+    ipaddress.ip_network(item.strip(), strict=False)
+    for item in PROFILE_ALLOWED_CLIENTS.split(",") if item.strip()
+]
+
+_ID_PATTERN = re.compile(r"^[0-9TZ]+-[0-9a-f]{8}$")
+
+# Leaf frames of threads that are waiting rather than running
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+# Set while the current request is profiled
+_active = contextvars.ContextVar("profiling", default=False)
+
+
+def profiling_active():
+    """Whether the current request runs under the profiler."""
+    return _active.get()
+
+
+def client_allowed(request):
+    """Whether `request` may be profiled or read profiles: profiling is on, the token matches and the client is allowed.
+
+    Requests that went through a proxy are refused, as their client address
+    is the proxy's.
+    """
+    if not PROFILE_TOKEN or request.client is None:
+        return False
+    if not secrets.compare_digest(request.headers.get("x-profile-token", ""), PROFILE_TOKEN):
+        return False
+    if any(header in request.headers for header in _PROXY_HEADERS):
+        return False
+    try:
+        address = ipaddress.ip_address(request.client.host)
+    except ValueError:
+        return False
+    return any(address in network for network in _allowed_networks)
+
+
+def profile_requested(request):
+    return request.query_params.get("profile") == "1" or request.headers.get("x-profile") == "1"
+
+
+def _frame_name(code):
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Sampler(threading.Thread):
+    """Samples the Python stacks of every busy thread until stopped, counting identical stacks."""
+
+    def __init__(self, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, str(ident))
+                code = frame.f_code
+                if name.startswith("profile-sampler") or (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(name)
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def _prune():
+    summaries = sorted(
+        (name for name in os.listdir(PROFILE_DIR) if name.endswith(".json")),
+        key=lambda name: os.path.getmtime(os.path.join(PROFILE_DIR, name)),
+    )
+    for name in summaries[:max(len(summaries) - PROFILE_KEEP, 0)]:
+        for suffix in (".json", ".folded"):
+            path = os.path.join(PROFILE_DIR, name[:-len(".json")] + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _write_profile(profile_id, sampler, summary):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.folded"), "w") as f:
+        for stack, count in sampler.stacks.most_common():
+            f.write(";".join(stack) + f" {count}\n")
+    # The summary is written last: a profile is listed once both files exist
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), "w") as f:
+        json.dump(summary, f)
+    _prune()
+
+
+def profile_requests():
+    """HTTP middleware running requests with `profile=1` (or `X-Profile: 1`) under the sampling profiler.
+
+    Only requests passing `client_allowed` are profiled (PROFILE_TOKEN set and
+    sent in `X-Profile-Token`, a client in PROFILE_ALLOWED_CLIENTS, no proxy
+    headers); the flag is ignored for everyone else. A profiled request bypasses the response cache and
+    runs its compute steps in-process, so that they show up in the profile.
+    The stacks of every busy thread are sampled while the response is being
+    produced (other requests in flight show up too) and saved in the folded
+    format read by flamegraph.pl and speedscope. The profile id is sent in the
+    `X-Profile-Id` header.
+    """
+
+    async def middleware(request, call_next):
+        if not profile_requested(request) or not client_allowed(request):
+            return await call_next(request)
+
+        profile_id = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + "-" + secrets.token_hex(4)
+        request.state.bypass_cache = True
+        sampler = _Sampler(PROFILE_INTERVAL_MS / 1000)
+        token = _active.set(True)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            response = await call_next(request)
+        finally:
+            sampler.stop()
+            _active.reset(token)
+        summary = {
+            "id": profile_id,
+            "path": request.url.path,
+            "query": str(request.url.query),
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "samples": sampler.samples,
+        }
+        try:
+            await run_in_threadpool(_write_profile, profile_id, sampler, summary)
+            response.headers["X-Profile-Id"] = profile_id
+        except Exception as e:
+            print(f"Error writing profile {profile_id}: {e}")
+        return response
+
+    return middleware
+
+
+def list_profiles():
+    """Summaries of the stored profiles, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    summaries = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                summaries.append(json.load(f))
+        except FileNotFoundError:
+            continue  # pruned meanwhile
+    return summaries
+
+
+def profile_path(profile_id):
+    """Path of the collapsed stacks of `profile_id`, or None if there is no such profile."""
+    if not _ID_PATTERN.match(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+    return path if os.path.exists(path) else None
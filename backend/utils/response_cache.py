@@ -0,0 +1,306 @@
+import contextvars
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import fastf1 as ff1
+import pandas as pd
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+from utils.cache import ByteBudgetCache
+from utils.encoding import FORMATS, MEDIA_TYPES
+from utils.metrics import current_endpoint, response_cache_requests, stage
+from utils.shared_cache import shared_cache
+
+# Budget for encoded endpoint responses kept in memory, in MB
+RESPONSE_CACHE_MB = int(os.environ.get("RESPONSE_CACHE_MB", "256"))
+
+# Optional on-disk tier shared by restarts; disabled when unset
+RESPONSE_CACHE_DIR = os.environ.get("RESPONSE_CACHE_DIR")
+RESPONSE_CACHE_DISK_MB = int(os.environ.get("RESPONSE_CACHE_DISK_MB", "2048"))
+
+# Seconds clients may reuse a response of completed sessions without revalidating it
+RESPONSE_MAX_AGE = int(os.environ.get("RESPONSE_MAX_AGE", "86400"))
+
+# Responses about sessions that are not final yet (or of unknown date) are reused for this many
+# seconds only, by clients and by the server caches
+RESPONSE_LIVE_MAX_AGE = int(os.environ.get("RESPONSE_LIVE_MAX_AGE", "60"))
+
+# Hours after its start at which a session's data is taken as final
+SESSION_FINAL_AFTER_HOURS = float(os.environ.get("SESSION_FINAL_AFTER_HOURS", "24"))
+
+# Bump when endpoint output changes, so responses cached on disk by older code are not served
+RESPONSE_CACHE_VERSION = 7
+
+# Query parameters whose values are sets: order and comma-separated vs repeated form do not matter
+SET_PARAMS = {"drivers", "session_years", "session_year", "views"}
+
+# Query parameters that do not change the response body
+IGNORED_PARAMS = {"format", "profile"}
+
+# Entries are (etag, body, expires); expires is 0 for responses about final sessions only
+response_cache = ByteBudgetCache(RESPONSE_CACHE_MB * 1024 * 1024, sizeof=lambda entry: len(entry[1]) + 128)
+
+# Session key -> (final, checked at); final sessions stay final, others are checked again
+_final_sessions = {}
+_final_lock = threading.Lock()
+
+# Set per request; cleared when something the response depends on failed to load
+_cacheable = contextvars.ContextVar("cacheable", default=None)
+
+
+def mark_uncacheable():
+    """Keep the current request's response out of the cache, e.g. because a session failed to load."""
+    state = _cacheable.get()
+    if state is not None:
+        state["cacheable"] = False
+
+
+def _format(request):
+    # Same resolution as encoding.response_format
+    fmt = request.query_params.get("format")
+    if fmt is None:
+        fmt = "msgpack" if "application/x-msgpack" in request.headers.get("accept", "") else "records"
+    return fmt
+
+
+def cache_key(request):
+    """Endpoint, response format and the query with set-valued parameters sorted.
+
+    `format` is part of the key on its own; the other IGNORED_PARAMS are left out.
+    """
+    params = {}
+    for name, value in request.query_params.multi_items():
+        if name in IGNORED_PARAMS:
+            continue
+        if name in SET_PARAMS:
+            params.setdefault(name, set()).update(v.strip() for v in value.split(","))
+        else:
+            params.setdefault(name, []).append(value)
+    query = tuple(sorted((name, tuple(sorted(values))) for name, values in params.items()))
+    return (request.url.path, _format(request), query)
+
+
+def _etag(body):
+    return '"' + hashlib.sha256(body).hexdigest() + '"'
+
+
+class _DiskTier:
+    """Encoded responses as files named by key hash, evicting the least recently used beyond `max_bytes`."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(os.path.getsize(p) for p in self._files())
+
+    def _files(self):
+        return [os.path.join(self.directory, n) for n in os.listdir(self.directory) if n.endswith(".bin")]
+
+    def _path(self, key):
+        digest = hashlib.sha256(json.dumps([RESPONSE_CACHE_VERSION, key]).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.bin")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+            os.utime(path)  # recency for eviction
+            return body
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading {path}: {e}")
+            return None
+
+    def put(self, key, body):
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self.total_bytes += len(body) - previous
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        files = sorted(self._files(), key=os.path.getmtime)
+        for path in files:
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self.total_bytes -= size
+            except OSError:
+                pass
+
+
+disk_tier = _DiskTier(RESPONSE_CACHE_DIR, RESPONSE_CACHE_DISK_MB * 1024 * 1024) if RESPONSE_CACHE_DIR else None
+
+
+def _shared_key(key):
+    return json.dumps(["response", RESPONSE_CACHE_VERSION, key])
+
+
+def session_final(key):
+    """Whether the session `key` started more than SESSION_FINAL_AFTER_HOURS ago; False if its date is unknown."""
+    now = time.time()
+    with _final_lock:
+        checked = _final_sessions.get(key)
+    if checked is not None and (checked[0] or now - checked[1] < RESPONSE_LIVE_MAX_AGE):
+        return checked[0]
+    try:
+        date = ff1.get_session(*key).date
+        final = not pd.isna(date) and date + pd.Timedelta(hours=SESSION_FINAL_AFTER_HOURS) < pd.Timestamp.utcnow().tz_localize(None)
+    except Exception as e:
+        print(f"Error looking up the date of session {key}: {e}")
+        final = False
+    with _final_lock:
+        _final_sessions[key] = (final, now)
+    return final
+
+
+def _session_keys(request):
+    params = request.query_params
+    name, identifier = params.get("session_name"), params.get("identifier")
+    years = {
+        v.strip() for p in ("session_year", "session_years") for value in params.getlist(p) for v in value.split(",")
+    } - {""}
+    if not name or not identifier or not years:
+        return []
+    try:
+        return [(int(year), name, identifier) for year in sorted(years)]
+    except ValueError:
+        return []
+
+
+def response_final(request):
+    """Whether every session the request is about is final; requests about no session are not."""
+    keys = _session_keys(request)
+    return bool(keys) and all(session_final(key) for key in keys)
+
+
+def _lookup(key):
+    entry = response_cache.get(key)
+    if entry is not None and entry[2] and entry[2] < time.time():
+        response_cache.pop(key)
+        entry = None
+    if entry is None and disk_tier is not None:
+        # Only responses about final sessions are written to disk
+        body = disk_tier.get(key)
+        if body is not None:
+            entry = (_etag(body), body, 0)
+            response_cache.put(key, entry)
+    return entry
+
+
+def _store(key, body, final):
+    entry = (_etag(body), body, 0 if final else time.time() + RESPONSE_LIVE_MAX_AGE)
+    response_cache.put(key, entry)
+    if disk_tier is not None and final:
+        disk_tier.put(key, body)
+    return entry
+
+
+async def _render(request, call_next, produced):
+    # The encoded body, or None when the response must not be cached; the response itself goes in `produced`
+    state = {"cacheable": True}
+    token = _cacheable.set(state)
+    try:
+        response = produced["response"] = await call_next(request)
+    finally:
+        _cacheable.reset(token)
+    if response.status_code != 200 or not state["cacheable"]:
+        return None
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def _response(request, key, entry):
+    etag, body, expires = entry
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={RESPONSE_MAX_AGE if not expires else RESPONSE_LIVE_MAX_AGE}",
+        "Vary": "Accept",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=MEDIA_TYPES[key[1]], headers=headers)
+
+
+def cache_responses(prefix="/api/v1/", exclude=()):
+    """HTTP middleware serving GET responses under `prefix` from the response cache.
+
+    Responses are cached as encoded bytes, keyed by `cache_key`, and sent with
+    a strong ETag; `If-None-Match` is answered with 304. Only 200 responses
+    are stored, and not when `mark_uncacheable` was called while computing them.
+    Responses about sessions that are final (see `session_final`) are cached
+    until evicted and sent with `max-age=RESPONSE_MAX_AGE`; all others expire
+    after RESPONSE_LIVE_MAX_AGE seconds, on the server and in clients. With a
+    shared cache backend, a response computed by one worker is served by all
+    of them, and concurrent misses for the same key are computed once.
+    """
+    exclude = set(exclude)
+
+    async def middleware(request, call_next):
+        path = request.url.path
+        if (
+            request.method != "GET"
+            or not path.startswith(prefix)
+            or path in exclude
+            or _format(request) not in FORMATS
+            # Set by other middleware, e.g. for profiled requests
+            or getattr(request.state, "bypass_cache", False)
+        ):
+            return await call_next(request)
+
+        key = cache_key(request)
+        with stage("response-cache"):
+            entry = _lookup(key)
+        response_cache_requests.inc(endpoint=current_endpoint(), result="miss" if entry is None else "hit")
+        if entry is not None:
+            return _response(request, key, entry)
+
+        final = await run_in_threadpool(response_final, request)
+        produced = {}
+        if shared_cache.shared:
+            # Workers missing the same key at the same time wait for the first one's response
+            body = await shared_cache.get_or_fill_async(
+                _shared_key(key), lambda: _render(request, call_next, produced),
+                ttl=None if final else RESPONSE_LIVE_MAX_AGE,
+            )
+        else:
+            body = await _render(request, call_next, produced)
+        if body is None:
+            return produced["response"]
+
+        with stage("response-cache"):
+            entry = _store(key, body, final)
+        return _response(request, key, entry)
+
+    return middleware
+
+
+def response_cache_stats():
+    stats = response_cache.stats()
+    if disk_tier is not None:
+        stats["disk_bytes"] = disk_tier.total_bytes
+        stats["disk_max_bytes"] = disk_tier.max_bytes
+    return stats
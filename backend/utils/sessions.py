@@ -0,0 +1,263 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import fastf1 as ff1
+from fastf1 import _api as api
+from fastf1.core import Telemetry
+
+from utils import channel_store
+from utils.cache import ByteBudgetCache, deep_nbytes
+from utils.compact import compact_telemetry
+from utils.lap_index import LapIndex
+from utils.metrics import session_load_seconds, stage
+from utils.response_cache import mark_uncacheable
+
+# Budget for loaded FastF1 sessions, in MB (a race with car + position data is a few hundred MB)
+SESSION_CACHE_MB = int(os.environ.get("SESSION_CACHE_MB", "2048"))
+
+# Sessions that are never evicted, e.g. "2024/Bahrain Grand Prix/R;2024/Saudi Arabian Grand Prix/R"
+PINNED_SESSIONS = os.environ.get("PINNED_SESSIONS", "")
+
+# Upper bound on sessions loaded at the same time, shared by all requests
+SESSION_LOAD_WORKERS = int(os.environ.get("SESSION_LOAD_WORKERS", "4"))
+
+# Load profiles: the telemetry channels loaded on top of the laps table.
+# Weather is never loaded; race control messages are part of every profile
+# because FastF1 derives the `Deleted` flag and personal bests from them.
+LAPS = "laps"
+LAPS_CAR = "laps+car"
+LAPS_CAR_POS = "laps+car+pos"
+
+LOAD_PROFILES = {
+    LAPS: (),
+    LAPS_CAR: ("car",),
+    LAPS_CAR_POS: ("car", "pos"),
+}
+
+_CHANNEL_ATTRS = {"car": "_car_data", "pos": "_pos_data"}
+_CHANNEL_LOADERS = {"car": api.car_data, "pos": api.position_data}
+
+
+def parse_session_list(text):
+    """Parse "year/event/identifier" entries separated by ';' into session keys."""
+    keys = []
+    for item in text.split(";"):
+        if not item.strip():
+            continue
+        year, name, identifier = (part.strip() for part in item.split("/"))
+        keys.append(session_key(year, name, identifier))
+    return keys
+
+
+def session_key(year, name, identifier):
+    return (int(year), name, identifier)
+
+
+def session_nbytes(session):
+    # Laps, results and the per-driver car/pos telemetry dicts hold nearly all of the memory.
+    # Memory-mapped channels live in the page cache, shared with other workers;
+    # only the columns copied out of them count.
+    mapped = getattr(session, "_mapped_channels", {})
+    skipped = {_CHANNEL_ATTRS[channel] for channel in mapped}
+    private = sum(deep_nbytes(value) for name, value in vars(session).items() if name not in skipped)
+    return private + sum(mapped.values())
+
+
+session_cache = ByteBudgetCache(SESSION_CACHE_MB * 1024 * 1024, sizeof=session_nbytes)
+for key in parse_session_list(PINNED_SESSIONS):
+    session_cache.pin(key)
+
+_load_pool = ThreadPoolExecutor(max_workers=SESSION_LOAD_WORKERS, thread_name_prefix="session-load")
+
+
+def loaded_channels(session):
+    return {channel for channel, attr in _CHANNEL_ATTRS.items() if hasattr(session, attr)}
+
+
+def _load_channels(key, session, channels):
+    """Load car and/or position telemetry into an already loaded session.
+
+    Mirrors `Session._load_telemetry`, but only fetches the requested channels.
+    `t0_date` is the latest offset over every loaded channel, so channels that
+    were loaded earlier get their time base shifted if it moves. Channels in
+    the channel store are memory-mapped instead of fetched; fetched channels
+    are compacted and written to it for the other workers.
+    """
+    raw, stored = {}, {}
+    for channel in channels:
+        meta = channel_store.read_channel_meta(key, channel)
+        if meta is not None:
+            stored[channel] = meta
+            continue
+        try:
+            raw[channel] = _CHANNEL_LOADERS[channel](session.api_path)
+        except api.SessionNotAvailableError:
+            print(f"{channel} data is unavailable for {session}")
+            raw[channel] = {}
+
+    offsets = {
+        # Latest offset of each driver, then the latest over the drivers
+        channel: max(max(d["Date"] - d["Time"]) for d in data.values()).round("ms")
+        for channel, data in raw.items() if data
+    }
+    offsets.update({channel: meta["offset"] for channel, meta in stored.items()})
+    previous_t0 = t0_date = getattr(session, "_t0_date", None)
+    if offsets:
+        new_t0 = max(offsets.values())
+        if t0_date is None or new_t0 > t0_date:
+            t0_date = new_t0
+    session._t0_date = t0_date
+
+    mapped = session.__dict__.setdefault("_mapped_channels", {})
+    if previous_t0 is not None and t0_date != previous_t0:
+        for channel in loaded_channels(session) - set(channels):
+            attr = _CHANNEL_ATTRS[channel]
+            shifted = {}
+            for drv, tel in getattr(session, attr).items():
+                tel = tel.copy()
+                tel["Time"] = tel["Date"] - t0_date
+                tel["SessionTime"] = tel["Time"]
+                shifted[drv] = tel
+            setattr(session, attr, shifted)
+            mapped.pop(channel, None)
+
+    for channel, meta in stored.items():
+        frames, copied = channel_store.read_channel(key, channel, meta, t0_date)
+        setattr(session, _CHANNEL_ATTRS[channel], {
+            drv: Telemetry(frames[drv], session=session, driver=drv)
+            for drv in session.drivers if drv in frames
+        })
+        mapped[channel] = copied
+
+    for channel, data in raw.items():
+        processed = {}
+        for drv in session.drivers:
+            if drv not in data:
+                continue
+            tel = Telemetry(
+                data[drv].drop(labels="Time", axis=1),
+                session=session,
+                driver=drv,
+                drop_unknown_channels=True,
+                _cast_default_cols=True,
+            )
+            tel["Date"] = tel["Date"].dt.round("ms")
+            tel["Time"] = tel["Date"] - t0_date
+            tel["SessionTime"] = tel["Time"]
+            processed[drv] = compact_telemetry(tel)
+        setattr(session, _CHANNEL_ATTRS[channel], processed)
+        if channel in offsets:
+            channel_store.write_channel(key, channel, processed, offsets[channel], t0_date)
+
+    if hasattr(session, "_laps") and t0_date is not None:
+        session._laps["LapStartDate"] = session._laps["LapStartTime"] + t0_date
+
+
+def _submit(fn, *args, **kwargs):
+    # The pool threads run in the caller's context, so stage timings and
+    # mark_uncacheable apply to the request that asked for the load
+    return _load_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _timed_load(profile, load, *args):
+    start = time.perf_counter()
+    with stage("session-load"):
+        result = load(*args)
+    session_load_seconds.observe(time.perf_counter() - start, profile=profile)
+    return result
+
+
+def _compact_channels(session):
+    for channel in loaded_channels(session):
+        for telemetry in getattr(session, _CHANNEL_ATTRS[channel]).values():
+            compact_telemetry(telemetry)
+
+
+def _prepare_session(session):
+    # Done once, as the session enters the cache: compact telemetry dtypes and the lap index
+    _compact_channels(session)
+    # Held while channels are added; goes away with the session when it is evicted
+    session._upgrade_lock = threading.Lock()
+    try:
+        session.lap_index = LapIndex(session.laps)
+    except Exception as e:
+        print(f"Error indexing the laps of {session}: {e}")
+        session.lap_index = None
+    return session
+
+
+def _load_session(key, profile):
+    session = ff1.get_session(*key)
+    session.load(laps=True, telemetry=False, weather=False, messages=True)
+    if LOAD_PROFILES[profile]:
+        _load_channels(key, session, LOAD_PROFILES[profile])
+    return session
+
+
+def get_loaded_session(year, name, identifier, profile=LAPS_CAR_POS):
+    """Return the cached session, loading at least the channels of `profile`.
+
+    A session cached with a lighter profile is upgraded in place; only the
+    missing channels are fetched. Cached sessions hold their telemetry in
+    compact dtypes (see utils/compact.py) and carry a `lap_index` (a
+    `LapIndex` of their laps, None if the laps failed to load).
+    """
+    # Concurrent requests for the same uncached session share a single load
+    key = session_key(year, name, identifier)
+    session = session_cache.get_or_load(
+        key, lambda: _prepare_session(_timed_load(profile, _load_session, key, profile))
+    )
+
+    missing = set(LOAD_PROFILES[profile]) - loaded_channels(session)
+    if missing:
+        with session._upgrade_lock:
+            missing = set(LOAD_PROFILES[profile]) - loaded_channels(session)
+            if missing:
+                _timed_load(profile, _load_channels, key, session, sorted(missing))
+                _compact_channels(session)
+                # Re-measure the session now that it holds more telemetry
+                session_cache.put(key, session)
+    return session
+
+
+def load_per_year(load, years, name, identifier, **kwargs):
+    """Run `load(year, name, identifier, **kwargs)` for every year on the shared load pool.
+
+    Returns `[(year, result), ...]` in request order; years that fail are logged and skipped.
+    """
+    with stage("load"):
+        futures = [
+            (year, _submit(load, year, name, identifier, **kwargs))
+            for year in years
+        ]
+        loaded = []
+        for year, future in futures:
+            try:
+                loaded.append((year, future.result()))
+            except Exception as e:
+                print(f"Error loading session for year {year}: {e}")
+                # A partial result must not be served from the response cache
+                mark_uncacheable()
+    return loaded
+
+
+def load_as_completed(load, items):
+    """Run `load(*item)` for every item on the shared load pool, yielding `(item, result)` as each finishes.
+
+    Items that fail are logged and skipped.
+    """
+    futures = {_submit(load, *item): item for item in items}
+    for future in as_completed(futures):
+        item = futures[future]
+        try:
+            yield item, future.result()
+        except Exception as e:
+            print(f"Error loading {item}: {e}")
+
+
+def load_sessions(years, name, identifier, profile=LAPS_CAR_POS):
+    """Load the session of every year in parallel and return `[(year, session), ...]` in order."""
+    return load_per_year(get_loaded_session, years, name, identifier, profile=profile)
@@ -0,0 +1,313 @@
+import abc
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from utils import store
+from utils.cache import ByteBudgetCache
+
+# Where derived results are shared: "local" keeps them in this process,
+# "sqlite" in a database file that every worker process on the host opens
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "local")
+SHARED_CACHE_PATH = os.environ.get("SHARED_CACHE_PATH", os.path.join(store.STORE_DIR, "shared-cache.sqlite"))
+
+# Size budget in MB and lifetime of entries in seconds (0: until evicted)
+SHARED_CACHE_MB = int(os.environ.get("SHARED_CACHE_MB", "1024"))
+SHARED_CACHE_TTL = float(os.environ.get("SHARED_CACHE_TTL", "0"))
+
+# Seconds after which a fill that has not finished (e.g. its worker died) is taken over
+SHARED_CACHE_FILL_TIMEOUT = float(os.environ.get("SHARED_CACHE_FILL_TIMEOUT", "120"))
+
+# Seconds between checks while another caller fills the same key
+_FILL_POLL = 0.05
+
+
+class CacheBackend(abc.ABC):
+    """Byte values by string key, with size and TTL eviction and fill-once loading.
+
+    Implementations provide `get`, `set`, `delete`, `stats` and a per-key fill
+    claim (`_claim_fill`/`_release_fill`). `shared` tells whether other
+    processes see the same entries.
+    """
+
+    shared = False
+
+    @abc.abstractmethod
+    def get(self, key, count=True):
+        """The value of `key`, or None; `count=False` leaves the hit/miss counters alone."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self, key):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def stats(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _claim_fill(self, key):
+        """Claim the right to fill `key`; False while another caller holds it."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _release_fill(self, key):
+        raise NotImplementedError
+
+    def _waited(self):
+        pass
+
+    def get_or_fill(self, key, fill, ttl=None):
+        """Return the value of `key`, calling `fill()` on a miss.
+
+        Only one caller (over every process sharing the backend) fills a key
+        at a time; the others wait for its value. `fill` returns bytes, or None
+        for a result that must not be cached, in which case None is returned
+        and the next waiter fills the key itself. If `fill` raises, the claim
+        is released and the exception propagates.
+        """
+        waited = False
+        while True:
+            value = self.get(key, count=not waited)
+            if value is not None:
+                return value
+            if self._claim_fill(key):
+                break
+            if not waited:
+                waited = True
+                self._waited()
+            time.sleep(_FILL_POLL)
+        try:
+            # Filled between the lookup and the claim
+            value = self.get(key, count=False)
+            if value is None:
+                value = fill()
+                if value is not None:
+                    self.set(key, value, ttl)
+            return value
+        finally:
+            self._release_fill(key)
+
+    async def get_or_fill_async(self, key, fill, ttl=None):
+        """`get_or_fill` for a coroutine function `fill`; waiting does not block the event loop."""
+        waited = False
+        while True:
+            value = await run_in_threadpool(self.get, key, not waited)
+            if value is not None:
+                return value
+            if await run_in_threadpool(self._claim_fill, key):
+                break
+            if not waited:
+                waited = True
+                self._waited()
+            await asyncio.sleep(_FILL_POLL)
+        try:
+            value = await run_in_threadpool(self.get, key, False)
+            if value is None:
+                value = await fill()
+                if value is not None:
+                    await run_in_threadpool(self.set, key, value, ttl)
+            return value
+        finally:
+            await run_in_threadpool(self._release_fill, key)
+
+
+class LocalBackend(CacheBackend):
+    """In-process backend: a byte-budget LRU of `(value, expires)` entries."""
+
+    def __init__(self, max_bytes, ttl=0):
+        self.ttl = ttl
+        self._cache = ByteBudgetCache(max_bytes, sizeof=lambda entry: len(entry[0]) + 64)
+        self._filling = set()
+        self._lock = threading.Lock()
+        self._coalesced = 0
+
+    def get(self, key, count=True):
+        entry = self._cache.get(key) if count else self._cache.peek(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires and expires < time.time():
+            self._cache.pop(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._cache.put(key, (value, time.time() + ttl if ttl else 0))
+
+    def delete(self, key):
+        self._cache.pop(key)
+
+    def _claim_fill(self, key):
+        with self._lock:
+            if key in self._filling:
+                return False
+            self._filling.add(key)
+            return True
+
+    def _release_fill(self, key):
+        with self._lock:
+            self._filling.discard(key)
+
+    def _waited(self):
+        with self._lock:
+            self._coalesced += 1
+
+    def stats(self):
+        stats = self._cache.stats()
+        with self._lock:
+            stats["coalesced"] = self._coalesced
+            stats["loading"] = len(self._filling)
+        stats["backend"] = "local"
+        return stats
+
+
+class SQLiteBackend(CacheBackend):
+    """Backend in a SQLite database file, shared by every process that opens it.
+
+    Entries are evicted when expired and, least recently used first, when
+    their total size exceeds `max_bytes`. Fill claims are rows of their own,
+    so concurrent misses in different workers are filled once.
+    """
+
+    shared = True
+
+    # Recency is refreshed at most this often per entry, to keep reads mostly read-only
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, path, max_bytes, ttl=0, fill_timeout=SHARED_CACHE_FILL_TIMEOUT):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.ttl = ttl
+        self.fill_timeout = fill_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        db = self._db()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            "expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        db.execute("CREATE TABLE IF NOT EXISTS fills (key TEXT PRIMARY KEY, started REAL NOT NULL)")
+
+    def _db(self):
+        # sqlite3 connections are per thread, and must not be inherited by forked workers
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _count(self, field, amount=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def get(self, key, count=True):
+        db = self._db()
+        now = time.time()
+        row = db.execute("SELECT value, expires, accessed FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] and row[1] < now):
+            if count:
+                self._count("misses")
+            return None
+        if count:
+            self._count("hits")
+        if row[2] < now - self.TOUCH_INTERVAL:
+            db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        db = self._db()
+        db.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, sqlite3.Binary(value), len(value), now + ttl if ttl else 0, now),
+        )
+        self._evict(db, now)
+
+    def delete(self, key):
+        self._db().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _evict(self, db, now):
+        evicted = db.execute("DELETE FROM entries WHERE expires > 0 AND expires < ?", (now,)).rowcount
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        while total > self.max_bytes:
+            rows = db.execute("SELECT key, size FROM entries ORDER BY accessed LIMIT 32").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                total -= size
+                evicted += db.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount
+        if evicted:
+            self._count("evictions", evicted)
+
+    def _claim_fill(self, key):
+        db = self._db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM fills WHERE key = ? AND started < ?", (key, now - self.fill_timeout))
+            claimed = db.execute("INSERT OR IGNORE INTO fills (key, started) VALUES (?, ?)", (key, now)).rowcount == 1
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def _release_fill(self, key):
+        self._db().execute("DELETE FROM fills WHERE key = ?", (key,))
+
+    def _waited(self):
+        self._count("coalesced")
+
+    def stats(self):
+        db = self._db()
+        entries, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        loading = db.execute("SELECT COUNT(*) FROM fills").fetchone()[0]
+        with self._lock:
+            return {
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                # Counters are this process's; entries and bytes are shared
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "loading": loading,
+                "backend": "sqlite",
+                "path": self.path,
+            }
+
+
+def make_backend(name=CACHE_BACKEND):
+    if name == "local":
+        return LocalBackend(SHARED_CACHE_MB * 1024 * 1024, ttl=SHARED_CACHE_TTL)
+    if name == "sqlite":
+        return SQLiteBackend(SHARED_CACHE_PATH, SHARED_CACHE_MB * 1024 * 1024, ttl=SHARED_CACHE_TTL)
+    raise ValueError(f"Unknown CACHE_BACKEND {name!r}; expected 'local' or 'sqlite'")
+
+
+# Derived results (encoded responses, circuit tables) shared between workers
+shared_cache = make_backend()
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine for pandas)
+except ImportError:
+    pyarrow = None
+
+# Root of the on-disk Parquet store, partitioned as <year>/<event>/<session>/
+STORE_DIR = os.environ.get("TELEMETRY_STORE_DIR", "Store")
+
+# The store needs pyarrow; without it every read misses and writes are skipped
+STORE_ENABLED = pyarrow is not None and os.environ.get("TELEMETRY_STORE", "1") != "0"
+
+# Bump when the layout or contents of stored files change; ingest.py re-ingests on mismatch
+STORE_VERSION = 2
+
+# Channels kept for every lap; this is everything the endpoints read from merged telemetry
+TELEMETRY_COLUMNS = [
+    "Time", "SessionTime", "Distance", "Speed", "RPM", "nGear",
+    "Throttle", "Brake", "DRS", "X", "Y",
+]
+
+# Laps columns needed by the pick_*() filters and the endpoints
+LAP_COLUMNS = [
+    "Time", "Driver", "DriverNumber", "LapTime", "LapNumber", "LapStartTime",
+    "PitInTime", "PitOutTime", "IsPersonalBest", "IsAccurate", "Deleted",
+    "Compound", "Team",
+]
+
+
+def session_dir(key):
+    year, name, identifier = key
+    return os.path.join(STORE_DIR, str(year), name, identifier)
+
+
+def _manifest_path(key):
+    return os.path.join(session_dir(key), "manifest.json")
+
+
+def _laps_path(key):
+    return os.path.join(session_dir(key), "laps.parquet")
+
+
+def _telemetry_path(key, driver, lap_number):
+    return os.path.join(session_dir(key), "telemetry", driver, f"{int(lap_number)}.parquet")
+
+
+def _read(path, columns):
+    if not STORE_ENABLED or not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path, columns=columns)
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return None
+
+
+def _write(path, frame):
+    if not STORE_ENABLED:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so concurrent readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error writing {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_laps(key, columns=LAP_COLUMNS):
+    return _read(_laps_path(key), columns)
+
+
+def write_laps(key, laps):
+    _write(_laps_path(key), pd.DataFrame(laps).reset_index(drop=True))
+
+
+def read_lap_telemetry(key, driver, lap_number, columns=TELEMETRY_COLUMNS):
+    return _read(_telemetry_path(key, driver, lap_number), columns)
+
+
+def write_lap_telemetry(key, driver, lap_number, telemetry):
+    _write(_telemetry_path(key, driver, lap_number), pd.DataFrame(telemetry[TELEMETRY_COLUMNS]))
+
+
+def read_manifest(key):
+    path = _manifest_path(key)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(key, manifest):
+    os.makedirs(session_dir(key), exist_ok=True)
+    with open(_manifest_path(key), "w") as f:
+        json.dump(manifest, f)
@@ -0,0 +1,90 @@
+import os
+
+import pandas as pd
+from fastf1.core import Laps
+
+from utils import store
+from utils.cache import ByteBudgetCache
+from utils.compact import compact_telemetry
+from utils.lap_index import LapIndex
+from utils.metrics import stage
+from utils.sessions import LAPS, get_loaded_session, load_per_year, session_cache, session_key
+
+# Budget for merged per-lap telemetry, in MB (one lap is a few hundred KB)
+TELEMETRY_CACHE_MB = int(os.environ.get("TELEMETRY_CACHE_MB", "256"))
+
+# Indexed laps tables read from the store; a race is well below 1 MB
+LAPS_CACHE_MB = 64
+
+telemetry_cache = ByteBudgetCache(TELEMETRY_CACHE_MB * 1024 * 1024)
+laps_cache = ByteBudgetCache(LAPS_CACHE_MB * 1024 * 1024, sizeof=lambda index: index.nbytes())
+
+
+def _load_laps(key):
+    laps = store.read_laps(key)
+    if laps is None:
+        laps = get_loaded_session(*key, profile=LAPS).laps
+        store.write_laps(key, laps)
+        laps = laps[[c for c in store.LAP_COLUMNS if c in laps.columns]]
+    # Detached from the session so the cached table does not keep it alive
+    return Laps(pd.DataFrame(laps))
+
+
+def get_lap_index(year, name, identifier):
+    """`LapIndex` of a session's laps, without building the session when it can be avoided.
+
+    Uses the cached session if there is one, then the Parquet store, and only
+    loads the session (laps profile) when neither has it.
+    """
+    key = session_key(year, name, identifier)
+    session = session_cache.peek(key)
+    if session is not None and session.lap_index is not None:
+        return session.lap_index
+    return laps_cache.get_or_load(key, lambda: LapIndex(_load_laps(key)))
+
+
+def load_lap_indexes(years, name, identifier):
+    """Parallel `get_lap_index` over several years, returning `[(year, index), ...]`; failing years are skipped."""
+    return load_per_year(get_lap_index, years, name, identifier)
+
+
+def _compute_lap_telemetry(key, lap):
+    with stage("telemetry"):
+        # Files stored before telemetry was compacted are converted on read
+        return compact_telemetry(_merge_lap_telemetry(key, lap))
+
+
+def _merge_lap_telemetry(key, lap):
+    driver, lap_number = lap["Driver"], int(lap["LapNumber"])
+    telemetry = store.read_lap_telemetry(key, driver, lap_number)
+    if telemetry is not None:
+        return telemetry
+
+    # Always the lap of a session with car and position data: `lap` may come
+    # from a stored laps table, or from a session cached with fewer channels
+    session = get_loaded_session(*key)
+    if session.lap_index is None:
+        raise RuntimeError(f"the laps of {session} could not be indexed")
+    lap = session.lap_index.lap(driver, lap_number)
+    if lap is None:
+        raise KeyError(f"lap {lap_number} of {driver} is not in {session}")
+    telemetry = lap.get_telemetry().add_distance()
+    telemetry = compact_telemetry(pd.DataFrame(telemetry[store.TELEMETRY_COLUMNS]))
+    store.write_lap_telemetry(key, driver, lap_number, telemetry)
+    return telemetry
+
+
+def get_lap_telemetry(year, name, identifier, lap):
+    """Merged car + position telemetry of `lap` with a Distance channel.
+
+    `Lap.get_telemetry()` is the most expensive call in the backend, so the
+    result is cached per (year, event, session, driver, lap number) and shared
+    between endpoints, in memory and in the Parquet store. Only
+    `store.TELEMETRY_COLUMNS` are kept, in compact dtypes. The returned frame
+    is shared: select or copy before adding columns to it.
+    """
+    key = session_key(year, name, identifier)
+    return telemetry_cache.get_or_load(
+        (*key, lap["Driver"], int(lap["LapNumber"])),
+        lambda: _compute_lap_telemetry(key, lap),
+    )
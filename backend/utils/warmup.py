@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+
+import fastf1 as ff1
+import pandas as pd
+
+from utils.circuits import get_circuit
+from utils.sessions import get_loaded_session, parse_session_list, session_key
+from utils.telemetry import get_lap_telemetry
+
+# Sessions loaded in the background when the server starts, as "year/event/identifier"
+# separated by ';' (same format as PINNED_SESSIONS), e.g. "2024/Bahrain Grand Prix/R"
+WARM_SESSIONS = os.environ.get("WARM_SESSIONS", "")
+
+# Also warm the sessions WARM_LAST_SESSIONS (identifiers separated by ',') of the last N events held
+WARM_LAST_EVENTS = int(os.environ.get("WARM_LAST_EVENTS", "0"))
+WARM_LAST_SESSIONS = os.environ.get("WARM_LAST_SESSIONS", "R")
+
+# Seasons looked back over to find the last events
+_MAX_SEASONS_BACK = 3
+
+# Progress of the warm-up, served on /ready
+_status = {
+    "state": "pending",  # pending, resolving, warming, done
+    "total": 0,
+    "warmed": [],
+    "failed": [],
+    "current": None,
+    "started": None,
+    "finished": None,
+}
+_status_lock = threading.Lock()
+
+
+def _update(**changes):
+    with _status_lock:
+        _status.update(changes)
+
+
+def last_events(count, now=None):
+    """`(year, event name)` of the last `count` events held before `now`, newest first."""
+    now = pd.Timestamp.now() if now is None else now
+    events = []
+    for year in range(now.year, now.year - _MAX_SEASONS_BACK, -1):
+        try:
+            schedule = ff1.get_event_schedule(year, include_testing=False)
+        except Exception as e:
+            print(f"Error loading the {year} event schedule: {e}")
+            continue
+        held = schedule[schedule["EventDate"] <= now].sort_values("EventDate", ascending=False)
+        events += [(year, name) for name in held["EventName"]]
+        if len(events) >= count:
+            break
+    return events[:count]
+
+
+def warm_keys():
+    """Session keys to warm: WARM_SESSIONS, then the sessions of the last WARM_LAST_EVENTS events."""
+    keys = parse_session_list(WARM_SESSIONS)
+    if WARM_LAST_EVENTS > 0:
+        identifiers = [i.strip() for i in WARM_LAST_SESSIONS.split(",") if i.strip()]
+        for year, name in last_events(WARM_LAST_EVENTS):
+            keys += [session_key(year, name, identifier) for identifier in identifiers]
+    # Keep the order, drop repeats
+    return list(dict.fromkeys(keys))
+
+
+def warm_session(key):
+    """Load a session with car and position data, the merged telemetry of the laps the endpoints use, and its circuit."""
+    session = get_loaded_session(*key)
+    index = session.lap_index
+    if index is None:
+        return
+    laps = [index.fastest(driver) for driver in index.drivers] + [index.fastest_quick()]
+    for lap in laps:
+        if lap is not None:
+            get_lap_telemetry(*key, lap)
+    get_circuit(*key)
+
+
+def _run():
+    try:
+        keys = warm_keys()
+    except Exception as e:
+        # e.g. a malformed WARM_SESSIONS entry; readiness must not wait forever
+        print(f"Error resolving the sessions to warm: {e}")
+        keys = []
+    _update(state="warming", total=len(keys))
+    for key in keys:
+        label = "/".join(str(part) for part in key)
+        _update(current=label)
+        try:
+            warm_session(key)
+        except Exception as e:
+            print(f"Error warming {label}: {e}")
+            with _status_lock:
+                _status["failed"].append(label)
+            continue
+        with _status_lock:
+            _status["warmed"].append(label)
+    _update(state="done", current=None, finished=time.time())
+
+
+def start_warmup():
+    """Warm the configured sessions on a background thread; progress is in `warmup_status()`."""
+    with _status_lock:
+        if _status["state"] != "pending":
+            return
+        _status.update(state="resolving", started=time.time())
+    if not WARM_SESSIONS.strip() and WARM_LAST_EVENTS <= 0:
+        _update(state="done", finished=time.time())
+        return
+    threading.Thread(target=_run, name="warmup", daemon=True).start()
+
+
+def warmup_status():
+    """Copy of the warm-up progress; `ready` once every configured session was tried (failures included)."""
+    with _status_lock:
+        status = dict(_status, warmed=list(_status["warmed"]), failed=list(_status["failed"]))
+    status["ready"] = status["state"] == "done"
+    return status